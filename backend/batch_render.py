@@ -0,0 +1,281 @@
+"""
+Offline video rendering through the gesture -> registry -> effect chain
+Splits a clip into keyframe-aligned segments, renders them in parallel worker
+processes and concatenates the result
+
+Usage:
+    python batch_render.py input.mp4 output.mp4 [--workers N] [--overlap 15]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Intermediate segment codec; the final output is re-encoded by ffmpeg when present
+SEGMENT_FOURCC = "mp4v"
+
+
+def probe_video(path: str) -> Tuple[int, float, int, int]:
+    """Return (frame_count, fps, width, height) for a video"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {path}")
+    try:
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        cap.release()
+    return frames, fps, width, height
+
+
+def probe_keyframes(path: str, fps: float) -> List[int]:
+    """Keyframe indices via ffprobe, or an empty list if ffprobe is unavailable"""
+    if shutil.which("ffprobe") is None:
+        return []
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey",
+        "-show_entries", "frame=pts_time", "-of", "csv=p=0", path
+    ]
+    try:
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"ffprobe failed, using fixed-size segments: {e}")
+        return []
+    keyframes = []
+    for line in output.splitlines():
+        line = line.strip().rstrip(",")
+        if line:
+            try:
+                keyframes.append(int(round(float(line) * fps)))
+            except ValueError:
+                continue
+    return sorted(set(keyframes))
+
+
+def plan_segments(total_frames: int, workers: int, keyframes: List[int],
+                  min_frames: int = 30) -> List[Tuple[int, int]]:
+    """
+    Split [0, total_frames) into about one segment per worker
+    Boundaries snap to the next keyframe so each segment decodes independently
+    """
+    target = max(min_frames, total_frames // max(1, workers))
+    boundaries = [0]
+    candidates = [k for k in keyframes if 0 < k < total_frames]
+    next_cut = target
+    while next_cut < total_frames:
+        if candidates:
+            snapped = next((k for k in candidates if k >= next_cut), None)
+            if snapped is None:
+                break
+            next_cut = snapped
+        if next_cut - boundaries[-1] >= min_frames and total_frames - next_cut >= min_frames:
+            boundaries.append(next_cut)
+        next_cut += target
+    boundaries.append(total_frames)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def read_frames(cap: cv2.VideoCapture, count: int) -> Iterator[np.ndarray]:
+    """Yield up to count frames from the capture's current position"""
+    for _ in range(count):
+        ok, frame = cap.read()
+        if not ok:
+            return
+        yield frame
+
+
+def render_segment(args: Tuple[str, str, int, int, int, float, Optional[str], List[int]]
+                   ) -> Tuple[str, int, float]:
+    """
+    Worker: render frames [start, end) into segment_path
+    The overlap frames before start are run through detection and effects but
+    not written, so tracking and temporal effects are warm at the cut. The
+    capture seeks to the keyframe at or before the warm-up and only decodes up
+    to it; effects animate by the absolute frame time, so segments join the
+    way a single pass would render them.
+    """
+    input_path, segment_path, start, end, overlap, fps, gestures_config, keyframes = args
+
+    from models.gesture_model import GestureDetector
+    from engine.core import EffectEngine
+    from engine.registry import EffectRegistry
+    from effects import create_effects
+
+    detector = GestureDetector()
+    registry = EffectRegistry(gestures_config, gesture_names=GestureDetector.GESTURE_NAMES)
+    # Offline output keeps full resolution; no frame budget to meet
+    engine = EffectEngine(frame_budget=0)
+    # Randomly initialized effect state (e.g. matrix columns) matches across segments
+    np.random.seed(0)
+    engine.load_effects(create_effects())
+
+    warm_start = max(0, start - overlap)
+    seek_to = max((k for k in keyframes if k <= warm_start), default=0) if keyframes else warm_start
+    cap = cv2.VideoCapture(input_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, seek_to)
+    for _ in range(warm_start - seek_to):
+        if not cap.grab():
+            break
+    writer = None
+    written = 0
+    began = time.monotonic()
+
+    try:
+        for index, frame in enumerate(read_frames(cap, end - warm_start)):
+            timestamp = (warm_start + index) / fps
+            mask = detector.detect_mask(frame, timestamp)
+            engine.set_active_effects(registry.get_effects_for_mask(mask))
+            engine.set_centers(detector.last_centers)
+            engine.set_clock(timestamp)
+            result = engine.process_frame(frame)
+
+            if warm_start + index < start:
+                continue  # Warm-up frame
+            if writer is None:
+                h, w = result.shape[:2]
+                writer = cv2.VideoWriter(
+                    segment_path, cv2.VideoWriter_fourcc(*SEGMENT_FOURCC), fps, (w, h)
+                )
+            writer.write(result)
+            written += 1
+    finally:
+        cap.release()
+        if writer is not None:
+            writer.release()
+        detector.close()
+
+    return segment_path, written, time.monotonic() - began
+
+
+def concat_segments(segment_paths: List[str], output_path: str, fps: float,
+                    audio_source: Optional[str] = None):
+    """Re-encode and concatenate rendered segments into the output file"""
+    if shutil.which("ffmpeg") is not None:
+        list_path = output_path + ".segments.txt"
+        with open(list_path, "w") as f:
+            for path in segment_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        cmd = ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_source is not None:
+            cmd += ["-i", audio_source, "-map", "0:v", "-map", "1:a?", "-c:a", "copy", "-shortest"]
+        cmd += ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "20", output_path]
+        try:
+            subprocess.run(cmd, check=True)
+            return
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"ffmpeg concat failed, falling back to OpenCV: {e}")
+        finally:
+            os.remove(list_path)
+
+    # Fallback: stream every segment through one OpenCV writer (no audio)
+    writer = None
+    try:
+        for path in segment_paths:
+            cap = cv2.VideoCapture(path)
+            try:
+                while True:
+                    ok, frame = cap.read()
+                    if not ok:
+                        break
+                    if writer is None:
+                        h, w = frame.shape[:2]
+                        writer = cv2.VideoWriter(
+                            output_path, cv2.VideoWriter_fourcc(*SEGMENT_FOURCC), fps, (w, h)
+                        )
+                    writer.write(frame)
+            finally:
+                cap.release()
+    finally:
+        if writer is not None:
+            writer.release()
+
+
+def render_video(input_path: str, output_path: str, workers: Optional[int] = None,
+                 overlap: int = 15, gestures_config: Optional[str] = None,
+                 keep_audio: bool = True) -> dict:
+    """Render a video through the effect pipeline; returns a throughput report"""
+    workers = workers or os.cpu_count() or 1
+    total_frames, fps, width, height = probe_video(input_path)
+    if total_frames <= 0:
+        raise ValueError(f"Video has no frames: {input_path}")
+
+    keyframes = probe_keyframes(input_path, fps)
+    segments = plan_segments(total_frames, workers, keyframes)
+    logger.info(
+        f"Rendering {total_frames} frames ({width}x{height} @ {fps:.2f} fps) "
+        f"in {len(segments)} segment(s) on {workers} worker(s)"
+    )
+
+    began = time.monotonic()
+    with tempfile.TemporaryDirectory(prefix="rg_segments_") as tmp_dir:
+        jobs = [
+            (input_path, os.path.join(tmp_dir, f"segment_{i:04d}.mp4"), start, end,
+             overlap, fps, gestures_config, keyframes)
+            for i, (start, end) in enumerate(segments)
+        ]
+        results = {}
+        busy_seconds = 0.0
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            futures = {pool.submit(render_segment, job): job[1] for job in jobs}
+            for future in as_completed(futures):
+                path, written, seconds = future.result()
+                results[path] = written
+                busy_seconds += seconds
+                logger.info(f"{Path(path).name}: {written} frames in {seconds:.1f}s")
+
+        render_seconds = time.monotonic() - began
+        concat_segments([job[1] for job in jobs], output_path, fps,
+                        input_path if keep_audio else None)
+
+    elapsed = time.monotonic() - began
+    frames = sum(results.values())
+    return {
+        "frames": frames,
+        "segments": len(segments),
+        "workers": workers,
+        "render_seconds": round(render_seconds, 3),
+        "total_seconds": round(elapsed, 3),
+        "fps": round(frames / render_seconds, 2) if render_seconds > 0 else 0.0,
+        "fps_per_core": round(frames / busy_seconds, 2) if busy_seconds > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a video through Reality Glitcher effects")
+    parser.add_argument("input", help="Input video file")
+    parser.add_argument("output", help="Output video file")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--overlap", type=int, default=15,
+                        help="Warm-up frames rendered before each segment and discarded")
+    parser.add_argument("--gestures", default=None, help="Gesture mapping config (default: configs/gestures.json)")
+    parser.add_argument("--no-audio", action="store_true", help="Do not copy audio from the input")
+    args = parser.parse_args()
+
+    report = render_video(args.input, args.output, args.workers, args.overlap,
+                          args.gestures, keep_audio=not args.no_audio)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+WebSocket connection management with per-client send queues
+Broadcasts serialize a message once per room and enqueue it on every member;
+each client drains its own bounded queue from a writer task, so a slow viewer
+never stalls other viewers or the session that produced the event
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Union
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOM = "default"
+
+# Close code sent to clients evicted for falling behind (RFC 6455 "try again later")
+SLOW_CLIENT_CLOSE_CODE = 1013
+# Close code for clients turned away while the server is at capacity
+BUSY_CLOSE_CODE = 1013
+
+Payload = Union[str, bytes]
+
+
+class QueuedMessage:
+    """An already-serialized outbound message"""
+    __slots__ = ("payload", "coalesce_key")
+
+    def __init__(self, payload: Payload, coalesce_key: Optional[str] = None):
+        self.payload = payload
+        self.coalesce_key = coalesce_key
+
+
+class ClientConnection:
+    """One connected client: its socket, rooms, outbound queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, client_id: str, max_queue: int = 8,
+                 max_lag: float = 5.0):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.rooms: Set[str] = set()
+        self.max_queue = max_queue
+        self.max_lag = max_lag
+        self.queue: Deque[QueuedMessage] = deque()
+        self.coalesced = 0
+        self.behind_since: Optional[float] = None
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self):
+        self.closed = True
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+
+    def enqueue(self, message: QueuedMessage) -> bool:
+        """
+        Queue a message without blocking
+        When the queue is full, a stale message with the same coalesce key is
+        replaced in place (only the newest gesture state matters); failing
+        that the oldest coalescable message is dropped. Returns False when the
+        client has been behind for longer than max_lag and should be evicted.
+        """
+        if self.closed:
+            return True
+
+        if len(self.queue) < self.max_queue:
+            self.queue.append(message)
+            self._ready.set()
+            return True
+
+        if self.behind_since is None:
+            self.behind_since = time.monotonic()
+
+        if message.coalesce_key is not None:
+            for i, queued in enumerate(self.queue):
+                if queued.coalesce_key == message.coalesce_key:
+                    self.queue[i] = message
+                    self.coalesced += 1
+                    break
+            else:
+                self._drop_oldest_coalescable()
+                self.queue.append(message)
+        else:
+            # Control traffic is never dropped; the queue may briefly overflow
+            self._drop_oldest_coalescable()
+            self.queue.append(message)
+
+        self._ready.set()
+        return time.monotonic() - self.behind_since <= self.max_lag
+
+    def _drop_oldest_coalescable(self):
+        for i, queued in enumerate(self.queue):
+            if queued.coalesce_key is not None:
+                del self.queue[i]
+                self.coalesced += 1
+                return
+
+    async def _write_loop(self):
+        try:
+            while True:
+                while not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                message = self.queue.popleft()
+                if isinstance(message.payload, bytes):
+                    await self.websocket.send_bytes(message.payload)
+                else:
+                    await self.websocket.send_text(message.payload)
+                if self.behind_since is not None and len(self.queue) <= self.max_queue // 2:
+                    self.behind_since = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending to client {self.client_id}: {e}")
+            self.closed = True
+
+
+class ConnectionManager:
+    """Tracks connected clients and fans messages out per room"""
+
+    def __init__(self, max_queue: int = 8, max_lag: float = 5.0):
+        self.max_queue = max_queue
+        self.max_lag = max_lag
+        self.clients: Dict[str, ClientConnection] = {}
+        self.rooms: Dict[str, Set[ClientConnection]] = {}
+        self.evicted = 0
+
+    async def connect(self, websocket: WebSocket, client_id: str,
+                      room: str = DEFAULT_ROOM) -> ClientConnection:
+        await websocket.accept()
+        client = ClientConnection(websocket, client_id, self.max_queue, self.max_lag)
+        self.clients[client_id] = client
+        self.join(client, room)
+        client.start()
+        logger.info(f"Client connected. Total connections: {len(self.clients)}")
+        return client
+
+    async def disconnect(self, client: ClientConnection):
+        if self.clients.pop(client.client_id, None) is None:
+            return
+        for room in list(client.rooms):
+            self.leave(client, room)
+        await client.stop()
+        logger.info(f"Client disconnected. Total connections: {len(self.clients)}")
+
+    def join(self, client: ClientConnection, room: str):
+        client.rooms.add(room)
+        self.rooms.setdefault(room, set()).add(client)
+
+    def leave(self, client: ClientConnection, room: str):
+        client.rooms.discard(room)
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(client)
+            if not members:
+                del self.rooms[room]
+
+    def move(self, client: ClientConnection, room: str):
+        """Leave every current room and join a single new one"""
+        for current in list(client.rooms):
+            self.leave(client, current)
+        self.join(client, room)
+
+    async def broadcast(self, message: Union[dict, bytes], room: str = DEFAULT_ROOM,
+                        coalesce_key: Optional[str] = None):
+        """
+        Broadcast to every client in a room
+        The message is serialized once regardless of how many viewers there are;
+        sends happen on the clients' writer tasks, so this never waits on a socket
+        """
+        members = self.rooms.get(room)
+        if not members:
+            return
+        payload = message if isinstance(message, bytes) else json.dumps(message)
+        queued = QueuedMessage(payload, coalesce_key)
+        for client in list(members):
+            await self._deliver(client, queued)
+
+    async def send(self, client: ClientConnection, message: Union[dict, bytes],
+                   coalesce_key: Optional[str] = None):
+        """Queue a message for a single client"""
+        payload = message if isinstance(message, bytes) else json.dumps(message)
+        await self._deliver(client, QueuedMessage(payload, coalesce_key))
+
+    async def _deliver(self, client: ClientConnection, message: QueuedMessage):
+        if client.closed:
+            # Writer hit a socket error; the receive loop may not have noticed yet
+            await self.disconnect(client)
+        elif not client.enqueue(message):
+            await self._evict(client)
+
+    async def _evict(self, client: ClientConnection):
+        if client.client_id not in self.clients:
+            return
+        self.evicted += 1
+        logger.warning(f"Evicting slow client {client.client_id} "
+                       f"({len(client.queue)} queued, {client.coalesced} coalesced)")
+        await self.disconnect(client)
+        try:
+            await client.websocket.close(code=SLOW_CLIENT_CLOSE_CODE)
+        except Exception:
+            pass
+
+    async def reject(self, client: ClientConnection, reason: str, message: str):
+        """Tell a client why it is turned away, then close it with BUSY_CLOSE_CODE"""
+        await self.disconnect(client)
+        try:
+            await client.websocket.send_text(json.dumps({
+                "type": "error",
+                "error": reason,
+                "message": message,
+            }))
+            await client.websocket.close(code=BUSY_CLOSE_CODE)
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections": len(self.clients),
+            "rooms": len(self.rooms),
+            "queued": sum(len(c.queue) for c in self.clients.values()),
+            "evicted": self.evicted,
+        }
@@ -1,2 +1,60 @@
 # Effects package
 
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from .depth_warp import DepthWarpEffect
+from .glitch import GlitchEffect
+from .liquify import LiquifyEffect
+from .matrix import MatrixEffect
+from .pixel_sort import PixelSortEffect
+from .vhs import VHSEffect
+from .warp import GravityFlipEffect, PortalRippleEffect, SlowMotionEffect
+
+# Effect names as used in configs/effects.json and configs/gestures.json
+EFFECT_CLASSES = {
+    "liquify": LiquifyEffect,
+    "vhs": VHSEffect,
+    "pixel_sort": PixelSortEffect,
+    "glitch": GlitchEffect,
+    "matrix": MatrixEffect,
+    "flipGravity": GravityFlipEffect,
+    "slow_motion": SlowMotionEffect,
+    "portal_ripple": PortalRippleEffect,
+    "depth_warp": DepthWarpEffect,
+}
+
+# Constructor options besides intensity that configs/effects.json may set
+EFFECT_OPTIONS = {
+    "depth_warp": ("mode",),
+}
+
+
+def create_effects(config_path: Optional[str] = None) -> Dict[str, object]:
+    """Instantiate every CPU effect with its intensity and options from configs/effects.json"""
+    if config_path is None:
+        config_path = os.path.join(
+            Path(__file__).parent.parent.parent,
+            "configs",
+            "effects.json"
+        )
+    
+    settings = {}
+    try:
+        with open(config_path, 'r') as f:
+            settings = json.load(f).get("effects", {})
+    except (OSError, ValueError) as e:
+        print(f"Error loading effect config: {e}")
+    
+    effects = {}
+    for name, effect_class in EFFECT_CLASSES.items():
+        effect_settings = settings.get(name, {})
+        options = {
+            option: effect_settings[option]
+            for option in EFFECT_OPTIONS.get(name, ())
+            if option in effect_settings
+        }
+        effects[name] = effect_class(intensity=effect_settings.get("intensity", 0.5), **options)
+    return effects
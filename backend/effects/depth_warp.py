@@ -0,0 +1,101 @@
+"""
+Depth-based warping: parallax and displacement driven by a depth map
+"""
+
+import numpy as np
+import cv2
+from typing import Optional, Tuple
+
+# Direction of the simulated viewpoint shift for parallax (x, y)
+PARALLAX_DIRECTION = (0.9, 0.45)
+
+class DepthWarpEffect:
+    """
+    Depth parallax / displacement as an engine effect
+    Depth values are treated as nearness in [0, 1] (MiDaS-style inverse depth).
+    The remap maps are built in float32 from the depth map and cached by
+    compute_maps, so apply and the engine's fused path both rebuild them only
+    when a new depth map arrives; apply also keeps a fixed-point copy.
+    """
+    
+    is_coordinate_transform = True
+    # Maps are rebuilt only per depth map, so a frame costs one full-size remap
+    is_reducible = False
+    
+    def __init__(self, intensity: float = 0.5, mode: str = "parallax"):
+        self.intensity = intensity
+        self.mode = mode
+        self.rebuilds = 0
+        
+        self._grid_shape: Optional[Tuple[int, int]] = None
+        self._grid_x: Optional[np.ndarray] = None
+        self._grid_y: Optional[np.ndarray] = None
+        
+        # Depth map and settings the float32 maps were built from
+        self._maps_key = None
+        self._maps_depth: Optional[np.ndarray] = None
+        self._maps: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        
+        # Fixed-point copy of _maps for apply
+        self._fixed_source: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._fixed: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    
+    def _base_grid(self, h: int, w: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self._grid_shape != (h, w):
+            self._grid_x, self._grid_y = np.meshgrid(
+                np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32)
+            )
+            self._grid_shape = (h, w)
+        return self._grid_x, self._grid_y
+    
+    def compute_maps(self, h: int, w: int, depth: np.ndarray,
+                     scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Float32 (map_x, map_y) sampling coordinates for a depth map
+        The shift is relative to the map size, so scale needs no correction.
+        The maps are cached until depth is replaced by a new map object or a
+        setting changes; callers must not modify them.
+        """
+        key = (h, w, scale, self.intensity, self.mode)
+        if key == self._maps_key and depth is self._maps_depth:
+            return self._maps
+        
+        source = depth
+        grid_x, grid_y = self._base_grid(h, w)
+        if depth.shape[:2] != (h, w):
+            depth = cv2.resize(depth, (w, h), interpolation=cv2.INTER_LINEAR)
+        depth = depth.astype(np.float32, copy=False)
+        amount = np.float32(self.intensity * 0.04 * max(h, w))
+        
+        if self.mode == "displacement":
+            # Push pixels down the depth gradient so near regions bulge out
+            grad_x = cv2.Sobel(depth, cv2.CV_32F, 1, 0, ksize=5)
+            grad_y = cv2.Sobel(depth, cv2.CV_32F, 0, 1, ksize=5)
+            gain = amount / max(float(np.abs(grad_x).max()), float(np.abs(grad_y).max()), 1e-6)
+            map_x = grid_x - grad_x * gain
+            map_y = grid_y - grad_y * gain
+        else:
+            # Near pixels move further than far ones, as if the camera shifted
+            offset = (depth - np.float32(0.5)) * amount
+            map_x = grid_x + offset * np.float32(PARALLAX_DIRECTION[0])
+            map_y = grid_y + offset * np.float32(PARALLAX_DIRECTION[1])
+        
+        self._maps_key = key
+        self._maps_depth = source
+        self._maps = (map_x, map_y)
+        self.rebuilds += 1
+        return self._maps
+    
+    def apply(self, frame: np.ndarray, depth: Optional[np.ndarray]) -> np.ndarray:
+        """Warp frame by depth; without a depth map the frame passes through"""
+        if depth is None:
+            return frame
+        
+        h, w = frame.shape[:2]
+        maps = self.compute_maps(h, w, depth)
+        if maps is not self._fixed_source:
+            self._fixed = cv2.convertMaps(maps[0], maps[1], cv2.CV_16SC2)
+            self._fixed_source = maps
+        
+        return cv2.remap(frame, self._fixed[0], self._fixed[1], cv2.INTER_LINEAR,
+                         borderMode=cv2.BORDER_REPLICATE)
@@ -0,0 +1,119 @@
+"""
+Cached geometry fields shared by the warp effects
+Distance and unit direction around a center are cut as zero-copy windows out
+of one radial atlas, so a moving center (e.g. one following the mouth) never
+recomputes any trig. Offsets from a center do not depend on the frame size,
+so a single atlas sized for the largest reach seen serves every resolution.
+Centers may lie outside the frame; ones more than a frame away are computed
+directly instead of growing the atlas
+"""
+
+import threading
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class PolarField(NamedTuple):
+    """Read-only float32 fields around a center; grid_x is (1, w), grid_y (h, 1)"""
+    grid_x: np.ndarray
+    grid_y: np.ndarray
+    dist: np.ndarray
+    cos: np.ndarray
+    sin: np.ndarray
+
+
+class RadialAtlas(NamedTuple):
+    """Read-only float32 distance and unit direction on a (2H, 2W) grid around (W, H)"""
+    dist: np.ndarray
+    cos: np.ndarray
+    sin: np.ndarray
+
+
+# Centers further than this many frame sizes from the frame's near edge are
+# computed directly rather than cut from the atlas
+MAX_ATLAS_REACH = 2
+
+# The one shared atlas; it only grows, when a larger reach is needed
+_atlas: Optional[RadialAtlas] = None
+_atlas_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def base_grid(h: int, w: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pixel coordinates as a (1, w) row and an (h, 1) column"""
+    grid_x = np.arange(w, dtype=np.float32).reshape(1, w)
+    grid_y = np.arange(h, dtype=np.float32).reshape(h, 1)
+    grid_x.setflags(write=False)
+    grid_y.setflags(write=False)
+    return grid_x, grid_y
+
+
+def round_center(center: Tuple[float, float]) -> Tuple[int, int]:
+    """Round a center to whole pixels; it may lie outside the frame"""
+    return int(round(center[0])), int(round(center[1]))
+
+
+def center_reach(h: int, w: int, center: Tuple[int, int]) -> Tuple[int, int]:
+    """Atlas half-size (rows, columns) an h x w frame around a whole-pixel center needs"""
+    cx, cy = center
+    return max(cy, h - cy), max(cx, w - cx)
+
+
+def atlas_window(atlas: RadialAtlas, h: int, w: int,
+                 center: Tuple[int, int]) -> Tuple[slice, slice]:
+    """Rows and columns of atlas that line up with an h x w frame around a whole-pixel center"""
+    half_h, half_w = atlas.dist.shape[0] // 2, atlas.dist.shape[1] // 2
+    cx, cy = center
+    return slice(half_h - cy, half_h - cy + h), slice(half_w - cx, half_w - cx + w)
+
+
+def radial_atlas(h: int, w: int) -> RadialAtlas:
+    """The shared atlas, grown first if its half-size is below h rows or w columns"""
+    global _atlas
+    atlas = _atlas
+    if atlas is not None and atlas.dist.shape[0] >= 2 * h and atlas.dist.shape[1] >= 2 * w:
+        return atlas
+    
+    with _atlas_lock:
+        atlas = _atlas
+        if atlas is not None:
+            h, w = max(h, atlas.dist.shape[0] // 2), max(w, atlas.dist.shape[1] // 2)
+            if atlas.dist.shape[0] >= 2 * h and atlas.dist.shape[1] >= 2 * w:
+                return atlas
+        
+        _atlas = _radial_fields(np.arange(-w, w, dtype=np.float32).reshape(1, 2 * w),
+                                np.arange(-h, h, dtype=np.float32).reshape(2 * h, 1))
+        return _atlas
+
+
+def _radial_fields(dx: np.ndarray, dy: np.ndarray) -> RadialAtlas:
+    """Read-only distance and unit direction for a (1, w) row and an (h, 1) column of offsets"""
+    dist = np.sqrt(dx * dx + dy * dy)
+    
+    # The center pixel itself points along +x, as arctan2(0, 0) did
+    safe = np.where(dist > 0, dist, np.float32(1))
+    cos = np.where(dist > 0, dx / safe, np.float32(1))
+    sin = np.where(dist > 0, dy / safe, np.float32(0))
+    
+    for array in (dist, cos, sin):
+        array.setflags(write=False)
+    return RadialAtlas(dist, cos, sin)
+
+
+def polar_field(h: int, w: int, center: Tuple[float, float]) -> PolarField:
+    """
+    Distance and unit direction of every pixel from center, rounded to whole pixels
+    Atlas views while the center is within MAX_ATLAS_REACH frames, else computed
+    """
+    grid_x, grid_y = base_grid(h, w)
+    center = round_center(center)
+    reach_h, reach_w = center_reach(h, w, center)
+    if reach_h > MAX_ATLAS_REACH * h or reach_w > MAX_ATLAS_REACH * w:
+        fields = _radial_fields(grid_x - np.float32(center[0]), grid_y - np.float32(center[1]))
+        return PolarField(grid_x, grid_y, *fields)
+    
+    atlas = radial_atlas(reach_h, reach_w)
+    window = atlas_window(atlas, h, w, center)
+    return PolarField(grid_x, grid_y, atlas.dist[window], atlas.cos[window], atlas.sin[window])
@@ -5,38 +5,28 @@ Glitch effects: pixel sort, data corruption, etc.
 import numpy as np
 import cv2
 
+from .pixel_sort import sort_pixels
+
 class GlitchEffect:
     """Various glitch effects"""
     
     def __init__(self, intensity: float = 0.5):
         self.intensity = intensity
     
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """Default engine entry point: data corruption overlay"""
+        return self.data_corruption(frame)
+    
     def pixel_sort(self, frame: np.ndarray, threshold: float = 0.5) -> np.ndarray:
         """
         Pixel sort glitch effect
         Sorts pixels in rows/columns based on brightness
         """
-        result = frame.copy()
-        h, w = frame.shape[:2]
-        
         # Convert to grayscale for threshold
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
-        # Find bright regions
-        mask = gray > (threshold * 255)
-        
-        # Sort pixels in each row where mask is True
-        for y in range(h):
-            row_mask = mask[y, :]
-            if np.any(row_mask):
-                # Get indices where mask is True
-                indices = np.where(row_mask)[0]
-                if len(indices) > 1:
-                    # Sort pixels in this region
-                    sorted_indices = np.argsort(gray[y, indices])
-                    result[y, indices] = result[y, indices[sorted_indices]]
-        
-        return result
+        # Sort the bright pixels of each row
+        return sort_pixels(frame, gray > (threshold * 255), gray)
     
     def data_corruption(self, frame: np.ndarray) -> np.ndarray:
         """Data corruption glitch - random block shifts"""
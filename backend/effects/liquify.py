@@ -6,11 +6,84 @@ import numpy as np
 import cv2
 from typing import Tuple
 
+from .geometry import base_grid, round_center
+
 class LiquifyEffect:
     """Liquify mesh deformation effect"""
     
+    # Pure coordinate warp; the engine may fuse it through compute_maps
+    is_coordinate_transform = True
+    # Maps are cached while the center holds still; building them small and
+    # upscaling every frame would cost more than the full-size remap
+    is_reducible = False
+    
     def __init__(self, intensity: float = 0.5):
         self.intensity = intensity
+        self._patch_key = None
+        self._patch = None
+        self._maps_key = None
+        self._maps = None
+    
+    def _displacement_patch(self, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Displacement (x, y) on the square of offsets within radius of the center
+        Nothing moves beyond radius, so this is all a frame of any size needs
+        """
+        key = (radius, self.intensity)
+        if key != self._patch_key:
+            reach = int(np.ceil(radius))
+            offsets = np.arange(-reach, reach + 1, dtype=np.float32)
+            dx = offsets.reshape(1, -1)
+            dy = offsets.reshape(-1, 1)
+            dist = np.sqrt(dx * dx + dy * dy)
+            
+            # Normalize distance
+            dist_norm = np.minimum(dist / np.float32(radius), np.float32(1))
+            
+            # Liquify displacement (wave-like), along the direction from the center
+            displacement = np.sin(dist_norm * np.float32(2 * np.pi))
+            displacement *= (1 - dist_norm) * np.float32(self.intensity * radius)
+            displacement /= np.where(dist > 0, dist, np.float32(1))
+            
+            self._patch = (displacement * dx, displacement * dy)
+            self._patch_key = key
+        return self._patch
+    
+    def compute_maps(self, h: int, w: int, center: Tuple[int, int],
+                     radius: int = 100, scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Float32 (map_x, map_y) sampling coordinates for a liquify at center
+        scale is h, w relative to the frame they stand for; pixel-sized
+        parameters shrink with it so reduced-resolution maps match full size
+        """
+        radius = radius * scale
+        cx, cy = round_center(center)
+        key = (h, w, cx, cy, radius, self.intensity)
+        if key == self._maps_key:
+            return self._maps
+        
+        grid_x, grid_y = base_grid(h, w)
+        map_x = np.broadcast_to(grid_x, (h, w)).copy()
+        map_y = np.broadcast_to(grid_y, (h, w)).copy()
+        
+        # Add the displacement where the patch overlaps the frame, clamped to image bounds
+        shift_x, shift_y = self._displacement_patch(radius)
+        reach = shift_x.shape[0] // 2
+        y0, y1 = max(cy - reach, 0), min(cy + reach + 1, h)
+        x0, x1 = max(cx - reach, 0), min(cx + reach + 1, w)
+        if y1 > y0 and x1 > x0:
+            frame_window = (slice(y0, y1), slice(x0, x1))
+            patch_window = (slice(y0 - cy + reach, y1 - cy + reach),
+                            slice(x0 - cx + reach, x1 - cx + reach))
+            map_x[frame_window] += shift_x[patch_window]
+            map_y[frame_window] += shift_y[patch_window]
+            np.clip(map_x[frame_window], 0, w - 1, out=map_x[frame_window])
+            np.clip(map_y[frame_window], 0, h - 1, out=map_y[frame_window])
+        
+        # The warp has no time term, so the maps hold until an input changes
+        self._maps_key = key
+        self._maps = (map_x, map_y)
+        return self._maps
     
     def apply(self, frame: np.ndarray, center: Tuple[int, int], radius: int = 100) -> np.ndarray:
         """
@@ -19,37 +92,5 @@ class LiquifyEffect:
         radius: radius of effect
         """
         h, w = frame.shape[:2]
-        result = frame.copy()
-        
-        # Create mesh grid
-        y, x = np.ogrid[:h, :w]
-        
-        # Distance from center
-        dx = x - center[0]
-        dy = y - center[1]
-        dist = np.sqrt(dx**2 + dy**2)
-        
-        # Normalize distance
-        dist_norm = np.clip(dist / radius, 0, 1)
-        
-        # Liquify displacement (wave-like)
-        displacement = np.sin(dist_norm * np.pi * 2) * (1 - dist_norm) * self.intensity * radius
-        
-        # Calculate new positions
-        angle = np.arctan2(dy, dx)
-        new_x = (x + displacement * np.cos(angle)).astype(np.float32)
-        new_y = (y + displacement * np.sin(angle)).astype(np.float32)
-        
-        # Clamp to image bounds
-        new_x = np.clip(new_x, 0, w - 1)
-        new_y = np.clip(new_y, 0, h - 1)
-        
-        # Remap
-        map_x, map_y = np.meshgrid(np.arange(w), np.arange(h))
-        map_x = new_x
-        map_y = new_y
-        
-        result = cv2.remap(frame, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
-        
-        return result
-
+        map_x, map_y = self.compute_maps(h, w, center, radius)
+        return cv2.remap(frame, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
@@ -12,6 +12,7 @@ class MatrixEffect:
     def __init__(self, intensity: float = 0.5):
         self.intensity = intensity
         self.columns: List[dict] = []
+        self._seek_frame = None
         self.chars = "01アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲン"
         self.init_columns()
     
@@ -19,18 +20,41 @@ class MatrixEffect:
         """Initialize falling code columns"""
         self.columns = []
         for i in range(num_columns):
+            y = np.random.randint(-100, 0)
             self.columns.append({
                 'x': i * 20,
-                'y': np.random.randint(-100, 0),
+                'y': y,
+                'x0': i * 20,
+                'y0': y,
                 'speed': np.random.uniform(2, 5),
                 'length': np.random.randint(10, 30),
                 'chars': [np.random.choice(list(self.chars)) for _ in range(30)]
             })
     
+    def seek(self, frame: float):
+        """Place the columns where they are at a nominal frame number (see EffectEngine.set_clock)"""
+        self._seek_frame = frame
+    
+    def _place_columns(self, h: int, w: int, frame: float):
+        # Columns restart at y = -100 once they pass the bottom; the column
+        # each restart lands in is derived from the restart count
+        span = h + 100
+        for index, col in enumerate(self.columns):
+            travel = col['y0'] + 100 + col['speed'] * frame
+            cycle = int(travel // span)
+            col['y'] = travel - cycle * span - 100
+            if cycle == 0:
+                col['x'] = col['x0']
+            else:
+                col['x'] = int(np.random.default_rng((index, cycle)).integers(0, w))
+    
     def apply(self, frame: np.ndarray) -> np.ndarray:
         """Apply matrix rain overlay to frame"""
         h, w = frame.shape[:2]
         overlay = frame.copy()
+        if self._seek_frame is not None:
+            self._place_columns(h, w, self._seek_frame)
+            self._seek_frame = None
         
         # Draw falling code
         for col in self.columns:
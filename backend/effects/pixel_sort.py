@@ -5,44 +5,73 @@ Pixel sorting effect (separate from glitch for modularity)
 import numpy as np
 import cv2
 
+def sort_pixels(frame: np.ndarray, mask: np.ndarray, gray: np.ndarray,
+                direction: str = "horizontal", mode: str = "row",
+                reverse: bool = False) -> np.ndarray:
+    """
+    Sort masked pixels by brightness along every row (or column) at once
+    mode 'row' sorts all masked pixels of a line together into the masked
+    positions (the classic behaviour); 'span' sorts each contiguous run of
+    masked pixels on its own. All masked pixels go through one segmented
+    sort on (segment, brightness), and ties keep their original order.
+    """
+    if direction == "vertical":
+        return np.ascontiguousarray(sort_pixels(
+            frame.transpose(1, 0, 2), mask.T, gray.T, "horizontal", mode, reverse
+        ).transpose(1, 0, 2))
+    
+    source = np.ascontiguousarray(frame)
+    result = source.copy()
+    h, w = mask.shape
+    positions = np.flatnonzero(mask)
+    if positions.size < 2:
+        return result
+    
+    if mode == "span":
+        # A span starts wherever the mask switches on within a row
+        starts = mask.copy()
+        starts[:, 1:] &= ~mask[:, :-1]
+        segments = np.cumsum(starts, axis=None)[positions]
+    else:
+        segments = positions // w
+    brightness = gray.ravel()[positions]
+    if reverse:
+        brightness = 255 - brightness
+    
+    # Pack (segment, brightness, index) into one int64 key; the index makes
+    # every key unique, so a plain sort is deterministic and stable
+    keys = (segments.astype(np.int64) * 256 + brightness) << 32
+    keys |= np.arange(positions.size, dtype=np.int64)
+    keys.sort()
+    order = keys & 0xFFFFFFFF
+    
+    # Move whole pixels as opaque items: one take and one put
+    pixel = np.dtype((np.void, source.itemsize * (source.size // (h * w))))
+    source_pixels = source.reshape(h * w, -1).view(pixel).ravel()
+    result_pixels = result.reshape(h * w, -1).view(pixel).ravel()
+    np.put(result_pixels, positions, np.take(source_pixels, positions[order]))
+    return result
+
+
 class PixelSortEffect:
     """Pixel sorting glitch effect"""
     
     def __init__(self, intensity: float = 0.5):
         self.intensity = intensity
     
-    def apply(self, frame: np.ndarray, direction: str = "horizontal") -> np.ndarray:
+    def apply(self, frame: np.ndarray, direction: str = "horizontal", mode: str = "row",
+              reverse: bool = False) -> np.ndarray:
         """
         Apply pixel sorting effect
         direction: 'horizontal' or 'vertical'
+        mode: 'row' sorts every masked pixel of a line, 'span' each contiguous run
+        reverse: sort bright to dark instead of dark to bright
         """
-        result = frame.copy()
-        h, w = frame.shape[:2]
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if direction not in ("horizontal", "vertical"):
+            return frame.copy()
         
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         threshold = int(200 * (1 - self.intensity))
         
-        if direction == "horizontal":
-            for y in range(h):
-                row = gray[y, :]
-                mask = row > threshold
-                
-                if np.any(mask):
-                    indices = np.where(mask)[0]
-                    if len(indices) > 1:
-                        sorted_indices = np.argsort(gray[y, indices])
-                        result[y, indices] = result[y, indices[sorted_indices]]
-        
-        elif direction == "vertical":
-            for x in range(w):
-                col = gray[:, x]
-                mask = col > threshold
-                
-                if np.any(mask):
-                    indices = np.where(mask)[0]
-                    if len(indices) > 1:
-                        sorted_indices = np.argsort(gray[indices, x])
-                        result[indices, x] = result[indices[sorted_indices], x]
-        
-        return result
+        return sort_pixels(frame, gray > threshold, gray, direction, mode, reverse)
 
@@ -4,41 +4,102 @@ VHS/CRT distortion effect
 
 import numpy as np
 import cv2
-from typing import Tuple
+from typing import Optional, Tuple
+
+# Scanline gain and noise are applied in fixed point with this many fraction bits
+FIXED_BITS = 7
+
+# Pre-generated noise textures, each larger than the biggest frame seen by
+# NOISE_MARGIN so every frame can read a different random window of a random
+# texture; smaller frames read smaller windows of the same textures
+NOISE_TEXTURES = 3
+NOISE_MARGIN = 64
 
 class VHSEffect:
-    """VHS-style distortion with scanlines and color shifts"""
+    """
+    VHS-style distortion with scanlines and color shifts
+    Works on int16 fixed-point buffers that are kept between frames; the
+    Gaussian noise comes from a small bank of textures generated once per
+    intensity and only regenerated when a larger frame arrives.
+    """
+    
+    # Per-pixel work on a downscaled copy saves less than the resize costs
+    is_reducible = False
     
-    def __init__(self, intensity: float = 0.5):
+    def __init__(self, intensity: float = 0.5, seed: Optional[int] = None):
         self.intensity = intensity
         self.scanline_offset = 0
+        self._rng = np.random.default_rng(seed)
+        
+        self._shape: Tuple[int, ...] = ()
+        self._scaled = None
+        self._shifted = None
+        self._noise_key = None
+        self._noise_bank = []
+    
+    def _buffers(self, shape: Tuple[int, ...]):
+        if shape != self._shape:
+            self._scaled = np.empty(shape, dtype=np.int16)
+            self._shifted = np.empty(shape, dtype=np.int16)
+            self._shape = shape
+    
+    def _noise(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """A random frame-sized window of a random pre-generated noise texture"""
+        h, w = shape[:2]
+        key = (shape[2:], self.intensity)
+        if key != self._noise_key:
+            self._noise_bank = []
+            self._noise_key = key
+        
+        bank_h, bank_w = self._noise_bank[0].shape[:2] if self._noise_bank else (0, 0)
+        if bank_h < h + NOISE_MARGIN or bank_w < w + NOISE_MARGIN:
+            texture_shape = (max(bank_h, h + NOISE_MARGIN), max(bank_w, w + NOISE_MARGIN)) + shape[2:]
+            sigma = 5 * self.intensity * (1 << FIXED_BITS)
+            self._noise_bank = [
+                np.round(self._rng.normal(0, sigma, texture_shape)).astype(np.int16)
+                for _ in range(NOISE_TEXTURES)
+            ]
+        
+        texture = self._noise_bank[self._rng.integers(NOISE_TEXTURES)]
+        y = self._rng.integers(texture.shape[0] - h + 1)
+        x = self._rng.integers(texture.shape[1] - w + 1)
+        return texture[y:y + h, x:x + w]
+    
+    def seek(self, frame: float):
+        """Jump the scanline roll to a nominal frame number (see EffectEngine.set_clock)"""
+        self.scanline_offset = frame * 0.1
     
     def apply(self, frame: np.ndarray) -> np.ndarray:
         """Apply VHS distortion to frame"""
         h, w = frame.shape[:2]
-        result = frame.copy().astype(np.float32)
+        self._buffers(frame.shape)
+        scaled, shifted = self._scaled, self._shifted
         
-        # Scanlines
+        # Scanlines, as a fixed-point gain per row
         scanline_pattern = np.sin(np.arange(h) * 0.1 + self.scanline_offset) * 0.1 + 0.9
-        scanline_pattern = scanline_pattern.reshape(-1, 1)
-        result = result * scanline_pattern
+        gain = np.round(scanline_pattern * (1 << FIXED_BITS)).astype(np.int16)
+        gain = gain.reshape(-1, 1, 1)
+        np.multiply(frame, gain, out=scaled, casting="unsafe")
         
-        # Color channel shift (chromatic aberration)
-        shift_amount = int(3 * self.intensity)
-        b, g, r = cv2.split(result)
+        # Color channel shift (chromatic aberration): blue left, red right,
+        # wrapping around like np.roll
+        s = int(3 * self.intensity) % w
+        shifted[:, :w - s, 0] = scaled[:, s:, 0]
+        shifted[:, w - s:, 0] = scaled[:, :s, 0]
+        shifted[:, :, 1] = scaled[:, :, 1]
+        shifted[:, s:, 2] = scaled[:, :w - s, 2]
+        shifted[:, :s, 2] = scaled[:, w - s:, 2]
         
-        # Shift channels
-        b_shifted = np.roll(b, -shift_amount, axis=1)
-        r_shifted = np.roll(r, shift_amount, axis=1)
+        # Add noise; the saturating add keeps bright pixels from wrapping
+        cv2.add(shifted, self._noise(frame.shape), dst=shifted)
         
-        result = cv2.merge([b_shifted, g, r_shifted])
-        
-        # Add noise
-        noise = np.random.normal(0, 5 * self.intensity, result.shape).astype(np.float32)
-        result = np.clip(result + noise, 0, 255)
+        # Back to 8 bits, truncating like the float version did
+        np.right_shift(shifted, FIXED_BITS, out=shifted)
+        np.clip(shifted, 0, 255, out=shifted)
+        result = np.empty(frame.shape, dtype=np.uint8)
+        np.copyto(result, shifted, casting="unsafe")
         
         # Update scanline offset
         self.scanline_offset += 0.1
         
-        return result.astype(np.uint8)
-
+        return result
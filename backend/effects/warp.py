@@ -6,61 +6,84 @@ import numpy as np
 import cv2
 from typing import Tuple
 
+from .geometry import base_grid, polar_field
+
 class WarpEffect:
     """Various warping effects"""
     
     def __init__(self, intensity: float = 0.5):
         self.intensity = intensity
         self.time = 0.0
+        
+        # Gravity maps have no time term and are kept until an input changes
+        self._gravity_key = None
+        self._gravity_maps = None
+    
+    def ripple_maps(self, h: int, w: int, center: Tuple[int, int],
+                    scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Float32 (map_x, map_y) for the ripple at the current time
+        scale is h, w relative to the frame they stand for; pixel-sized terms follow it
+        """
+        field = polar_field(h, w, center)
+        
+        # wave = amplitude * sin(0.1 * dist / scale - 2t), on the frame-sized window only
+        phase = cv2.addWeighted(field.dist, 0.1 / scale, field.dist, 0, -self.time * 2)
+        wave = np.sin(phase, out=phase)
+        wave *= np.float32(self.intensity * 20 * scale)
+        
+        map_x = cv2.multiply(wave, field.cos)
+        map_x += field.grid_x
+        np.clip(map_x, 0, w - 1, out=map_x)
+        map_y = cv2.multiply(wave, field.sin)
+        map_y += field.grid_y
+        np.clip(map_y, 0, h - 1, out=map_y)
+        return map_x, map_y
+    
+    def seek(self, frame: float):
+        """Jump the animation to a nominal frame number (see EffectEngine.set_clock)"""
+        self.time = frame * 0.1
     
     def portal_ripple(self, frame: np.ndarray, center: Tuple[int, int]) -> np.ndarray:
         """Portal ripple effect from center point"""
         h, w = frame.shape[:2]
-        result = frame.copy()
-        
-        # Create ripple displacement map
-        y, x = np.ogrid[:h, :w]
-        dx = x - center[0]
-        dy = y - center[1]
-        dist = np.sqrt(dx**2 + dy**2)
-        
-        # Ripple wave
-        wave = np.sin(dist * 0.1 - self.time * 2) * self.intensity * 20
-        
-        # Calculate new positions
-        angle = np.arctan2(dy, dx)
-        new_x = (x + wave * np.cos(angle)).astype(np.float32)
-        new_y = (y + wave * np.sin(angle)).astype(np.float32)
-        
-        # Clamp
-        new_x = np.clip(new_x, 0, w - 1)
-        new_y = np.clip(new_y, 0, h - 1)
-        
-        result = cv2.remap(frame, new_x, new_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+        map_x, map_y = self.ripple_maps(h, w, center)
+        result = cv2.remap(frame, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
         
         self.time += 0.1
         return result
     
-    def gravity_flip(self, frame: np.ndarray, flip_vertical: bool = True) -> np.ndarray:
-        """Gravity flip effect - invert and add distortion"""
-        if flip_vertical:
-            result = cv2.flip(frame, 0)  # Vertical flip
-        else:
-            result = cv2.flip(frame, 1)  # Horizontal flip
+    def gravity_maps(self, h: int, w: int, flip_vertical: bool = True,
+                     scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Float32 (map_x, map_y) for the flip plus gravity distortion"""
+        key = (h, w, flip_vertical, self.intensity, scale)
+        if key == self._gravity_key:
+            return self._gravity_maps
         
-        # Add warping to simulate gravity
-        h, w = result.shape[:2]
-        y, x = np.ogrid[:h, :w]
+        grid_x, grid_y = base_grid(h, w)
         
-        # Gravity distortion (stronger at bottom)
-        gravity_strength = (y / h) * self.intensity * 10
-        new_x = (x + np.sin(x * 0.05) * gravity_strength).astype(np.float32)
-        new_y = y.astype(np.float32)
+        # Gravity distortion (stronger at bottom), sampled from the flipped frame
+        gravity_strength = grid_y * np.float32(self.intensity * 10 * scale / h)
+        new_x = np.clip(grid_x + np.sin(grid_x * np.float32(0.05 / scale)) * gravity_strength, 0, w - 1)
         
-        new_x = np.clip(new_x, 0, w - 1)
-        result = cv2.remap(result, new_x, new_y, cv2.INTER_LINEAR)
+        # Fold the flip into the same lookup instead of copying the frame first
+        if flip_vertical:
+            map_x = new_x
+            map_y = np.broadcast_to(np.float32(h - 1) - grid_y, (h, w)).copy()
+        else:
+            map_x = np.float32(w - 1) - new_x
+            map_y = np.broadcast_to(grid_y, (h, w)).copy()
         
-        return result
+        # No time term either, so these hold until size or intensity change
+        self._gravity_key = key
+        self._gravity_maps = (map_x, map_y)
+        return self._gravity_maps
+    
+    def gravity_flip(self, frame: np.ndarray, flip_vertical: bool = True) -> np.ndarray:
+        """Gravity flip effect - invert and add distortion"""
+        h, w = frame.shape[:2]
+        map_x, map_y = self.gravity_maps(h, w, flip_vertical)
+        return cv2.remap(frame, map_x, map_y, cv2.INTER_LINEAR)
     
     def slow_motion_shader(self, frame: np.ndarray, prev_frame: np.ndarray = None) -> np.ndarray:
         """Slow motion effect with motion blur and frame ghosting"""
@@ -80,3 +103,40 @@ class WarpEffect:
         
         return result
 
+
+class PortalRippleEffect(WarpEffect):
+    """Portal ripple as a standalone engine effect"""
+    
+    is_coordinate_transform = True
+    
+    def compute_maps(self, h: int, w: int, center: Tuple[int, int],
+                     scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Maps for one frame of apply (advances the ripple time)"""
+        maps = self.ripple_maps(h, w, center, scale)
+        self.time += 0.1
+        return maps
+    
+    def apply(self, frame: np.ndarray, center: Tuple[int, int]) -> np.ndarray:
+        return self.portal_ripple(frame, center)
+
+
+class GravityFlipEffect(WarpEffect):
+    """Gravity flip as a standalone engine effect"""
+    
+    is_coordinate_transform = True
+    # The maps are cached, so only the remap is left and it is full size anyway
+    is_reducible = False
+    
+    def compute_maps(self, h: int, w: int, scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Maps for one frame of apply"""
+        return self.gravity_maps(h, w, True, scale)
+    
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        return self.gravity_flip(frame)
+
+
+class SlowMotionEffect(WarpEffect):
+    """Slow motion ghosting as a standalone engine effect"""
+    
+    def apply(self, frame: np.ndarray, prev_frame: np.ndarray = None) -> np.ndarray:
+        return self.slow_motion_shader(frame, prev_frame)
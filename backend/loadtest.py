@@ -0,0 +1,198 @@
+"""
+Synthetic multi-client load generator for the /ws endpoint
+Opens N simulated cameras that stream pre-encoded frames at a target fps and
+measures the round trip from sending a frame to receiving its gesture event
+
+Usage:
+    python loadtest.py --clients 16 --fps 30 --duration 30 --source clip.mp4
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from protocol import pack_frame, FORMAT_JPEG
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+
+def load_frames(source: Optional[str], max_frames: int, width: int, quality: int) -> List[bytes]:
+    """
+    Pre-encode JPEG frames from a video file, an image glob/directory, or
+    synthetic noise when no source is given, so encoding never skews timings
+    """
+    images: List[np.ndarray] = []
+    if source and os.path.isfile(source) and not source.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
+        cap = cv2.VideoCapture(source)
+        while len(images) < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            images.append(frame)
+        cap.release()
+    elif source:
+        pattern = os.path.join(source, "*") if os.path.isdir(source) else source
+        for path in sorted(glob.glob(pattern))[:max_frames]:
+            frame = cv2.imread(path)
+            if frame is not None:
+                images.append(frame)
+
+    if not images:
+        rng = np.random.default_rng(0)
+        images = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(min(max_frames, 30))]
+
+    encoded = []
+    for frame in images:
+        h, w = frame.shape[:2]
+        if w != width:
+            frame = cv2.resize(frame, (width, int(h * width / w)), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if ok:
+            encoded.append(buffer.tobytes())
+    return encoded
+
+
+class SimulatedClient:
+    """One simulated camera with its own room so events are not cross-talk"""
+
+    def __init__(self, index: int, url: str, frames: List[bytes], fps: float):
+        self.index = index
+        self.url = url
+        self.frames = frames
+        self.fps = fps
+        self.sent = 0
+        self.acked = 0
+        self.latencies: List[float] = []
+        self.server_dropped = 0
+        self.errors = 0
+        self._send_times: Dict[int, float] = {}
+
+    async def run(self, duration: float):
+        separator = "&" if "?" in self.url else "?"
+        url = f"{self.url}{separator}room=loadtest-{self.index}"
+        try:
+            async with websockets.connect(url, max_size=None) as ws:
+                # Ask for a gesture_event on every frame instead of deltas only
+                await ws.send(json.dumps({"type": "control", "control": "deltas", "enabled": False}))
+                receiver = asyncio.create_task(self._receive(ws))
+                try:
+                    await self._send(ws, duration)
+                    # Give in-flight frames a moment to come back
+                    await asyncio.sleep(min(2.0, 5.0 / self.fps))
+                finally:
+                    receiver.cancel()
+        except Exception as e:
+            self.errors += 1
+            print(f"client {self.index}: {e}")
+
+    async def _send(self, ws, duration: float):
+        interval = 1.0 / self.fps
+        start = time.perf_counter()
+        next_send = start
+        while time.perf_counter() - start < duration:
+            payload = self.frames[self.sent % len(self.frames)]
+            sequence = self.sent
+            self._send_times[sequence] = time.perf_counter()
+            await ws.send(pack_frame(payload, FORMAT_JPEG, sequence, time.time() * 1000.0))
+            self.sent += 1
+            next_send += interval
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_send = time.perf_counter()  # Fell behind; do not burst
+
+    async def _receive(self, ws):
+        async for message in ws:
+            if isinstance(message, bytes):
+                continue
+            event = json.loads(message)
+            if event.get("type") == "frame_stats":
+                self.server_dropped = event.get("dropped", self.server_dropped)
+                continue
+            if event.get("type") != "gesture_event":
+                continue
+            sent_at = self._send_times.pop(event.get("sequence"), None)
+            if sent_at is not None:
+                self.latencies.append(time.perf_counter() - sent_at)
+                self.acked += 1
+
+
+async def run_load(url: str, clients: int, fps: float, duration: float,
+                   frames: List[bytes], ramp: float = 0.0) -> dict:
+    """Run the load test and return a JSON-serializable report"""
+    sims = [SimulatedClient(i, url, frames, fps) for i in range(clients)]
+
+    async def start(sim: SimulatedClient):
+        if ramp > 0:
+            await asyncio.sleep(ramp * sim.index / max(1, clients))
+        await sim.run(duration)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(start(sim) for sim in sims))
+    elapsed = time.perf_counter() - began
+
+    latencies = np.array([lat for sim in sims for lat in sim.latencies]) * 1000.0
+    sent = sum(sim.sent for sim in sims)
+    acked = sum(sim.acked for sim in sims)
+
+    def pct(q: float) -> Optional[float]:
+        return round(float(np.percentile(latencies, q)), 2) if latencies.size else None
+
+    return {
+        "url": url,
+        "clients": clients,
+        "target_fps": fps,
+        "duration_seconds": round(elapsed, 2),
+        "frame_bytes_avg": int(np.mean([len(f) for f in frames])),
+        "frames_sent": sent,
+        "events_received": acked,
+        "throughput_fps": round(acked / elapsed, 2) if elapsed > 0 else 0.0,
+        "per_client_fps": round(acked / elapsed / clients, 2) if elapsed > 0 else 0.0,
+        "drop_rate": round(1.0 - acked / sent, 4) if sent else 0.0,
+        "server_dropped": sum(sim.server_dropped for sim in sims),
+        "connection_errors": sum(sim.errors for sim in sims),
+        "latency_ms": {"p50": pct(50), "p95": pct(95), "p99": pct(99),
+                       "max": round(float(latencies.max()), 2) if latencies.size else None},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Reality Glitcher /ws endpoint")
+    parser.add_argument("--url", default="ws://localhost:8000/ws")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of streaming per client")
+    parser.add_argument("--source", default=None, help="Video file, image directory or glob (default: noise)")
+    parser.add_argument("--max-frames", type=int, default=120, help="Frames to pre-encode and loop")
+    parser.add_argument("--width", type=int, default=640, help="Resize frames to this width")
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which clients connect")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if websockets is None:
+        raise SystemExit("The websockets package is required: pip install websockets")
+
+    frames = load_frames(args.source, args.max_frames, args.width, args.quality)
+    report = asyncio.run(run_load(args.url, args.clients, args.fps, args.duration, frames, args.ramp))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Lightweight Prometheus-style metrics for the gesture and effect pipeline
+Histograms use fixed buckets with a bisect per observation, so instrumentation
+can stay on under full load; rendering happens only when /metrics is scraped
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds: 0.25 ms .. 1 s
+LATENCY_BUCKETS = (
+    0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.0075, 0.01, 0.015,
+    0.02, 0.033, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram for one label set"""
+
+    __slots__ = ("buckets", "counts", "total", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+
+class HistogramFamily:
+    """Histograms sharing a name and keyed by one label"""
+
+    def __init__(self, name: str, help_text: str, label: str,
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = buckets
+        self.children: Dict[str, Histogram] = {}
+
+    def labels(self, value: str) -> Histogram:
+        child = self.children.get(value)
+        if child is None:
+            child = self.children.setdefault(value, Histogram(self.buckets))
+        return child
+
+    def observe(self, value_label: str, value: float):
+        self.labels(value_label).observe(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_value, hist in sorted(self.children.items()):
+            with hist._lock:
+                counts = list(hist.counts)
+                total, count = hist.total, hist.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{{{self.label}="{label_value}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {total}')
+            lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {count}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter",
+                f"{self.name} {self.value}"]
+
+
+class CounterFamily:
+    """Counters sharing a name and keyed by one label"""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.children: Dict[str, Counter] = {}
+
+    def labels(self, value: str) -> Counter:
+        child = self.children.get(value)
+        if child is None:
+            child = self.children.setdefault(value, Counter(self.name, self.help))
+        return child
+
+    def inc(self, value_label: str, amount: int = 1):
+        self.labels(value_label).inc(amount)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_value, counter in sorted(self.children.items()):
+            lines.append(f'{self.name}{{{self.label}="{label_value}"}} {counter.value}')
+        return lines
+
+
+class CallbackGauge:
+    """Gauge sampled at scrape time from a callback returning (labels, value) pairs"""
+
+    def __init__(self, name: str, help_text: str, label: Optional[str],
+                 callback: Callable[[], Iterable[Tuple[str, float]]], kind: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.callback = callback
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for label_value, value in self.callback():
+            if self.label is None:
+                lines.append(f"{self.name} {value}")
+            else:
+                lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value}')
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in Prometheus text format"""
+
+    def __init__(self):
+        self.metrics: List = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Pipeline stage latencies: decode, face_mesh, hands, pose, registry, broadcast
+stage_latency = registry.register(HistogramFamily(
+    "rg_stage_latency_seconds", "Latency of gesture pipeline stages", "stage"
+))
+
+# Per-effect latency inside EffectEngine.process_frame
+effect_latency = registry.register(HistogramFamily(
+    "rg_effect_latency_seconds", "Latency of each effect in EffectEngine", "effect"
+))
+
+frames_dropped = registry.register(Counter(
+    "rg_frames_dropped_total", "Frames dropped by latest-frame-wins scheduling"
+))
+
+frames_motion_skipped = registry.register(Counter(
+    "rg_frames_motion_skipped_total", "Frames answered from the motion gate without inference"
+))
+
+# Face mesh passes by input; roi / (roi + roi_miss) is the ROI tracking hit rate
+face_mesh_passes = registry.register(CounterFamily(
+    "rg_face_mesh_passes_total", "Face mesh passes by input: roi, roi_miss (retried full frame) or full", "mode"
+))
@@ -2,9 +2,19 @@
 Depth estimation using MiDaS model for depth-based warping effects
 """
 
+import logging
+import os
+import threading
+import time
 import cv2
 import numpy as np
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Depth runs on frames downscaled to this width, at most this many times a second
+DEPTH_WIDTH = int(os.environ.get("RG_DEPTH_WIDTH", 256))
+DEPTH_FPS = float(os.environ.get("RG_DEPTH_FPS", 5.0))
 
 class DepthEstimator:
     """Depth estimation for depth-based effects"""
@@ -47,3 +57,176 @@ class DepthEstimator:
             return 0.0
         return float(depth_map[y, x])
 
+
+def guided_upsample(depth: np.ndarray, guide: np.ndarray, radius: int = 4,
+                    eps: float = 1e-3) -> np.ndarray:
+    """
+    Edge-aware upsampling of a low-res depth map to the guide's resolution
+    Fast guided filter: the linear coefficients are fitted with box filters at
+    the depth map's resolution and only they are upsampled, so depth edges
+    snap to image edges at the cost of a few low-res passes
+    """
+    h, w = guide.shape[:2]
+    dh, dw = depth.shape[:2]
+    gray = guide if guide.ndim == 2 else cv2.cvtColor(guide, cv2.COLOR_BGR2GRAY)
+    guide_full = gray.astype(np.float32) * (1.0 / 255.0)
+    guide_low = cv2.resize(guide_full, (dw, dh), interpolation=cv2.INTER_AREA)
+    
+    size = (2 * radius + 1, 2 * radius + 1)
+    mean_i = cv2.boxFilter(guide_low, -1, size)
+    mean_p = cv2.boxFilter(depth, -1, size)
+    var_i = cv2.boxFilter(guide_low * guide_low, -1, size) - mean_i * mean_i
+    cov_ip = cv2.boxFilter(guide_low * depth, -1, size) - mean_i * mean_p
+    
+    a = cov_ip / (var_i + eps)
+    b = mean_p - a * mean_i
+    a = cv2.resize(cv2.boxFilter(a, -1, size), (w, h), interpolation=cv2.INTER_LINEAR)
+    b = cv2.resize(cv2.boxFilter(b, -1, size), (w, h), interpolation=cv2.INTER_LINEAR)
+    return cv2.min(cv2.max(a * guide_full + b, 0.0), 1.0)
+
+
+class DepthService:
+    """
+    Asynchronous low-resolution depth for the frame loop
+    submit() hands over frames without blocking; a background worker picks up
+    the newest one at most `fps` times a second, estimates depth on a copy
+    downscaled to `width` and caches it. get() returns the cached map upsampled
+    to the caller's resolution (edge-aware when enabled), reusing the result
+    until a new map arrives, so effects always get a slightly stale but
+    fresh-enough map immediately.
+    """
+    
+    def __init__(self, estimator: Optional[DepthEstimator] = None, width: int = DEPTH_WIDTH,
+                 fps: float = DEPTH_FPS, edge_aware: bool = True, max_age: float = 2.0):
+        self.estimator = estimator or DepthEstimator()
+        self.width = width
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.edge_aware = edge_aware
+        self.max_age = max_age
+        
+        # Newest submitted (downscaled frame, full-res gray), taken by the worker
+        self._pending: Optional[Tuple[np.ndarray, Optional[np.ndarray]]] = None
+        self._last_submit = 0.0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        
+        # Latest low-res map with its guide and the time it was computed
+        self.version = 0
+        self._depth: Optional[np.ndarray] = None
+        self._guide: Optional[np.ndarray] = None
+        self._updated = 0.0
+        self._upsampled: Dict[Tuple[int, int], Tuple[int, np.ndarray]] = {}
+        # Resolution callers last asked for; the worker upsamples to it ahead of time
+        self._target: Optional[Tuple[int, int]] = None
+        
+        self.submitted = 0
+        self.computed = 0
+        self.last_latency = 0.0
+    
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="depth", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def submit(self, frame: np.ndarray) -> bool:
+        """Offer a frame for depth estimation; returns False if rate limited"""
+        if self._thread is None:
+            self.start()
+        now = time.monotonic()
+        if now - self._last_submit < self.interval:
+            return False
+        self._last_submit = now
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.width / w)
+        small = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+        # Full-res gray of the same frame guides edge-aware upsampling
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if self.edge_aware else None
+        with self._condition:
+            self._pending = (small, gray)
+            self.submitted += 1
+            self._condition.notify()
+        return True
+    
+    def get(self, shape: Tuple[int, int], guide: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Latest depth map (float32, 0-1) at shape (h, w), or None if there is
+        none yet or it is older than max_age; guide overrides the source frame
+        used for edge-aware upsampling
+        """
+        with self._condition:
+            depth, source, version, updated = self._depth, self._guide, self.version, self._updated
+        if depth is None or time.monotonic() - updated > self.max_age:
+            return None
+        
+        h, w = shape[:2]
+        self._target = (h, w)
+        cached = self._upsampled.get((h, w))
+        custom_guide = guide is not None
+        if cached is not None and cached[0] == version and not custom_guide:
+            return cached[1]
+        
+        upsampled = self._upsample(depth, guide if custom_guide else source, (h, w))
+        if not custom_guide:
+            self._upsampled = {(h, w): (version, upsampled)}
+        return upsampled
+    
+    def _upsample(self, depth: np.ndarray, guide: Optional[np.ndarray],
+                  shape: Tuple[int, int]) -> np.ndarray:
+        h, w = shape
+        if self.edge_aware and guide is not None:
+            if guide.shape[:2] != (h, w):
+                guide = cv2.resize(guide, (w, h), interpolation=cv2.INTER_LINEAR)
+            return guided_upsample(depth, guide)
+        return cv2.resize(depth, (w, h), interpolation=cv2.INTER_LINEAR)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                (frame, gray), self._pending = self._pending, None
+            
+            start = time.perf_counter()
+            try:
+                depth = self.estimator.estimate_depth(frame)
+            except Exception as e:
+                logger.error(f"Depth estimation failed: {e}")
+                continue
+            if depth is None:
+                continue
+            depth = depth.astype(np.float32, copy=False)
+            
+            # Upsample for the resolution in use so get() only hands it out
+            target = self._target
+            upsampled = self._upsample(depth, gray, target) if target is not None else None
+            self.last_latency = time.perf_counter() - start
+            
+            with self._condition:
+                self._depth = depth
+                self._guide = gray
+                self._updated = time.monotonic()
+                self.version += 1
+                self.computed += 1
+                if upsampled is not None:
+                    self._upsampled = {target: (self.version, upsampled)}
+    
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "computed": self.computed,
+            "version": self.version,
+            "latency_ms": round(self.last_latency * 1000.0, 2),
+        }
@@ -0,0 +1,249 @@
+"""
+Bounded pool of GestureDetector instances leased per session
+Each detector carries per-stream state (MediaPipe tracking, face ROI, gesture
+filter, motion reference, model schedule) and is not thread-safe, so a
+detector serves exactly one session and one inference call at a time.
+Sessions keep their detector until released, new sessions wait up to
+ACQUIRE_TIMEOUT when every detector is bound, and idle detectors are evicted.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .gesture_model import GestureDetector
+
+logger = logging.getLogger(__name__)
+
+# Detector cap, independent of the CPU count: each detector is one session's
+# MediaPipe graph set, while max_concurrency bounds the inference threads
+MAX_DETECTORS = int(os.environ.get("RG_MAX_DETECTORS", 8))
+# Seconds a new session waits for a detector before it is turned away
+ACQUIRE_TIMEOUT = float(os.environ.get("RG_DETECTOR_WAIT", 5.0))
+
+
+class DetectorPoolBusy(RuntimeError):
+    """Every detector stayed bound to other sessions for ACQUIRE_TIMEOUT"""
+
+
+class PooledDetector:
+    """A detector instance plus its lease bookkeeping"""
+
+    def __init__(self, detector: GestureDetector):
+        self.detector = detector
+        self.lock = asyncio.Lock()
+        # Held by the executor thread for the whole call; a cancelled run()
+        # releases self.lock while its thread may still be inside the detector
+        self.thread_lock = threading.Lock()
+        # Submitted executor calls that have not finished yet
+        self.in_flight = 0
+        # Set when the detector is rebound; the reset runs in the executor
+        self.needs_reset = False
+        self.sessions: Set[str] = set()
+        self.last_used = time.monotonic()
+
+    @property
+    def free(self) -> bool:
+        """Unbound with no work left running on it"""
+        return not self.sessions and self.in_flight == 0
+
+
+class DetectorPool:
+    """
+    Session-affine pool of gesture detectors
+    max_detectors bounds how many MediaPipe graph sets are kept alive and
+    max_concurrency bounds how many inference calls run at once (one
+    executor thread each). When every detector is bound, new sessions wait
+    up to acquire_timeout for one to be released and then get
+    DetectorPoolBusy; detectors are never shared between sessions.
+    """
+
+    def __init__(self, factory: Callable[[], GestureDetector] = GestureDetector,
+                 max_detectors: Optional[int] = None,
+                 max_concurrency: Optional[int] = None,
+                 idle_timeout: float = 60.0,
+                 acquire_timeout: float = ACQUIRE_TIMEOUT,
+                 observer: Optional[Callable[[Dict[str, float], bool, Optional[str]], None]] = None):
+        self.factory = factory
+        self.observer = observer
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.max_detectors = max_detectors or MAX_DETECTORS
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+
+        self.detectors: List[PooledDetector] = []
+        self.bindings: Dict[str, PooledDetector] = {}
+        # Latest face anchors per session (GestureDetector.last_centers)
+        self.centers: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        self.queued = 0
+        self._available = asyncio.Condition()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="gesture-detector"
+        )
+
+    def start(self):
+        """Detectors are created lazily; present for parity with ProcessDetectorPool"""
+
+    async def acquire(self, session_id: str) -> PooledDetector:
+        """
+        Bind a session to a detector, preferring warm free ones
+        Waits when all are bound; raises DetectorPoolBusy after acquire_timeout
+        """
+        pooled = self.bindings.get(session_id)
+        if pooled is not None:
+            return pooled
+
+        try:
+            return await asyncio.wait_for(self._wait_for_detector(session_id), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise DetectorPoolBusy(
+                f"All {self.max_detectors} gesture detectors are in use"
+            ) from None
+
+    async def _wait_for_detector(self, session_id: str) -> PooledDetector:
+        async with self._available:
+            warned = False
+            while True:
+                pooled = self.bindings.get(session_id)
+                if pooled is not None:
+                    return pooled
+                self._evict_idle()
+                pooled = self._bind_free(session_id)
+                if pooled is not None:
+                    return pooled
+                if not warned:
+                    logger.warning(
+                        f"Detector pool exhausted ({self.max_detectors} bound), "
+                        f"session {session_id} waits for a free detector"
+                    )
+                    warned = True
+                await self._available.wait()
+
+    def _bind_free(self, session_id: str) -> Optional[PooledDetector]:
+        free = [d for d in self.detectors if d.free]
+        if free:
+            # Most recently used detector is the warmest
+            pooled = max(free, key=lambda d: d.last_used)
+            pooled.needs_reset = True
+        elif len(self.detectors) < self.max_detectors:
+            pooled = PooledDetector(self.factory())
+            self.detectors.append(pooled)
+            logger.info(f"Created gesture detector {len(self.detectors)}/{self.max_detectors}")
+        else:
+            return None
+
+        pooled.sessions.add(session_id)
+        self.bindings[session_id] = pooled
+        return pooled
+
+    def release(self, session_id: str):
+        """Unbind a session; its detector stays warm until evicted"""
+        pooled = self.bindings.pop(session_id, None)
+        self.centers.pop(session_id, None)
+        if pooled is not None:
+            pooled.sessions.discard(session_id)
+            pooled.last_used = time.monotonic()
+        self._evict_idle()
+        self._notify_available()
+
+    def _notify_available(self):
+        async def notify():
+            async with self._available:
+                self._available.notify_all()
+
+        try:
+            asyncio.get_running_loop().create_task(notify())
+        except RuntimeError:
+            pass  # No loop running, so nobody can be waiting
+
+    async def run(self, session_id: str, fn: Callable[[GestureDetector], Any]) -> Any:
+        """Run fn(detector) on the session's detector in the pool executor"""
+        loop = asyncio.get_running_loop()
+        # Calls waiting for a free detector or executor slot
+        self.queued += 1
+        waiting = True
+        try:
+            pooled = await self.acquire(session_id)
+            async with self._semaphore, pooled.lock:
+                self.queued -= 1
+                waiting = False
+                pooled.in_flight += 1
+                future = self._executor.submit(self._call, pooled, fn)
+                future.add_done_callback(
+                    lambda _: loop.call_soon_threadsafe(self._call_done, pooled)
+                )
+                return await asyncio.wrap_future(future)
+        finally:
+            if waiting:
+                self.queued -= 1
+
+    @staticmethod
+    def _call(pooled: PooledDetector, fn: Callable[[GestureDetector], Any]) -> Any:
+        """Executor side of run(): reset a rebound detector, then call fn"""
+        with pooled.thread_lock:
+            if pooled.needs_reset:
+                pooled.detector.reset()
+                pooled.needs_reset = False
+            return fn(pooled.detector)
+
+    def _call_done(self, pooled: PooledDetector):
+        pooled.in_flight -= 1
+        pooled.last_used = time.monotonic()
+        if pooled.free:
+            self._notify_available()
+
+    async def detect(self, session_id: str, frame: Optional[np.ndarray]) -> int:
+        """Detect gestures on a decoded frame with the session's detector, as a bitmask"""
+        def detect(detector: GestureDetector) -> Tuple[int, Dict[str, Tuple[float, float]]]:
+            mask = detector.detect_mask(frame)
+            if self.observer is not None:
+                self.observer(detector.last_timings, detector.last_skipped, detector.last_face_mode)
+            return mask, detector.last_centers
+        
+        mask, centers = await self.run(session_id, detect)
+        # A session released while the call ran must not leave its entry behind
+        if session_id in self.bindings:
+            self.centers[session_id] = centers
+        return mask
+
+    def get_centers(self, session_id: str) -> Dict[str, Tuple[float, float]]:
+        """Face anchors from the session's latest detection, normalized to [0, 1]"""
+        return self.centers.get(session_id, {})
+
+    def stats(self) -> Dict[str, int]:
+        """Pool occupancy"""
+        return {
+            "detectors": len(self.detectors),
+            "bound_sessions": len(self.bindings),
+            "queued": self.queued,
+            "max_detectors": self.max_detectors,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    def shutdown(self):
+        """Close every detector and stop the executor"""
+        self._executor.shutdown(wait=True)
+        for pooled in self.detectors:
+            pooled.detector.close()
+        self.detectors = []
+        self.bindings = {}
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        keep = []
+        for pooled in self.detectors:
+            idle = pooled.free and not pooled.lock.locked()
+            if idle and now - pooled.last_used > self.idle_timeout:
+                pooled.detector.close()
+                logger.info("Evicted idle gesture detector")
+            else:
+                keep.append(pooled)
+        self.detectors = keep
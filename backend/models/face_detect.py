@@ -3,9 +3,12 @@ Face detection using MediaPipe Face Mesh
 Detects facial landmarks for gesture recognition
 """
 
+import os
 import cv2
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import Tuple, Optional
+
+from .landmarks import landmark_lists_to_array
 
 try:
     import mediapipe as mp
@@ -14,137 +17,211 @@ except ImportError:
     MEDIAPIPE_AVAILABLE = False
     print("Warning: MediaPipe not available. Install with: pip install mediapipe (requires Python 3.8-3.11)")
 
+# ROI tracking: run FaceMesh on a padded square around the last face instead
+# of on the full frame. Crops are resized to 192x192, the input size of the
+# FaceMesh landmark model, so MediaPipe does not resample them again
+FACE_TRACKING = os.environ.get("RG_FACE_TRACKING", "1") != "0"
+ROI_INPUT_SIZE = 192
+ROI_PADDING = 0.25
+ROI_MIN_SIDE = 64
+
+# Faces per frame; tracking only applies when a single face is tracked
+MAX_NUM_FACES = int(os.environ.get("RG_MAX_FACES", 1))
+
+# FaceMesh landmark count with refine_landmarks=True (468 mesh + 10 iris)
+NUM_LANDMARKS = 478
+
+# Landmark index arrays gathered from the (N, 478, 3) landmark array
+# EAR points per eye, ordered p0..p5: corners p0/p3, lids p1/p5 and p2/p4
+EAR_INDICES = np.array([
+    [33, 7, 163, 144, 145, 153],
+    [362, 382, 381, 380, 374, 373],
+])
+LIP_INDICES = np.array([13, 14])            # Upper and lower inner lip
+MOUTH_CORNER_INDICES = np.array([61, 291])  # Left and right mouth corner
+EYEBROW_INDICES = np.array([107, 336])      # Left and right inner brow
+EYE_CORNER_INDICES = np.array([33, 362])    # Eye corners the brows are compared to
+
+
+def compute_face_features(points: np.ndarray) -> dict:
+    """
+    Gesture features for every face in an (N, 478, 3) landmark array
+    Each value is an array with one entry per face (per eye/brow: (N, 2))
+    """
+    xy = points[..., :2]
+    
+    # Eye aspect ratio: (|p1 - p5| + |p2 - p4|) / (2 |p0 - p3|)
+    eyes = xy[:, EAR_INDICES]  # (N, 2, 6, 2)
+    vertical = (np.linalg.norm(eyes[:, :, 1] - eyes[:, :, 5], axis=-1)
+                + np.linalg.norm(eyes[:, :, 2] - eyes[:, :, 4], axis=-1))
+    horizontal = np.linalg.norm(eyes[:, :, 0] - eyes[:, :, 3], axis=-1)
+    ear = np.divide(vertical, 2.0 * horizontal, out=np.zeros_like(vertical), where=horizontal > 0)
+    
+    # Mouth opening relative to mouth width
+    lips = xy[:, LIP_INDICES]
+    corners = xy[:, MOUTH_CORNER_INDICES]
+    opening = np.abs(lips[:, 0, 1] - lips[:, 1, 1])
+    width = np.linalg.norm(corners[:, 0] - corners[:, 1], axis=-1)
+    mouth_open = np.divide(opening, width, out=np.zeros_like(opening), where=width > 0)
+    
+    # Smile: corner-to-upper-lip distances relative to corner distance
+    to_center = np.linalg.norm(corners - lips[:, :1], axis=-1).sum(axis=-1)
+    smile = np.divide(to_center, width, out=np.zeros_like(to_center), where=width > 0)
+    
+    # Eyebrow raise: brow above the eye corner by a fixed margin
+    brow_y = xy[:, EYEBROW_INDICES, 1]
+    eye_y = xy[:, EYE_CORNER_INDICES, 1]
+    eyebrow_height = eye_y - brow_y
+    
+    return {
+        'ear': ear,
+        'mouth_open': mouth_open,
+        'smile': smile,
+        'eyebrow_height': eyebrow_height,
+    }
+
+
+def compute_face_centers(points: np.ndarray) -> dict:
+    """Normalized (x, y) anchor points for every face in an (N, 478, 3) landmark array"""
+    xy = points[..., :2]
+    mouth = xy[:, np.concatenate((LIP_INDICES, MOUTH_CORNER_INDICES))]
+    return {
+        'mouth': mouth.mean(axis=1),
+        'face': xy.mean(axis=1),
+    }
+
+
 class FaceDetector:
     """MediaPipe-based face detection and landmark extraction"""
     
-    def __init__(self):
+    def __init__(self, tracking: bool = FACE_TRACKING, roi_size: int = ROI_INPUT_SIZE,
+                 roi_padding: float = ROI_PADDING, max_num_faces: int = MAX_NUM_FACES):
+        self.max_num_faces = max(1, max_num_faces)
+        self.tracking = tracking and self.max_num_faces == 1
+        self.roi_size = roi_size
+        self.roi_padding = roi_padding
+        
+        # (x0, y0, side) of the crop for the next frame, None when not tracking
+        self.roi: Optional[Tuple[int, int, int]] = None
+        # Input of the last pass: 'roi' (crop found the face), 'roi_miss'
+        # (crop lost it, retried at full size) or 'full'; None before any pass
+        self.last_mode: Optional[str] = None
+        
         if not MEDIAPIPE_AVAILABLE:
             self.face_mesh = None
+            self.roi_face_mesh = None
             self.mp_drawing = None
             return
         
         self.mp_face_mesh = mp.solutions.face_mesh
         self.face_mesh = self.mp_face_mesh.FaceMesh(
             static_image_mode=False,
-            max_num_faces=1,
+            max_num_faces=self.max_num_faces,
             refine_landmarks=True,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
+        # Crops get their own video-mode graph: feeding crops and full frames
+        # through one graph would hand its temporal tracking two coordinate
+        # frames every time tracking switches mode
+        self.roi_face_mesh = None
+        if self.tracking:
+            self.roi_face_mesh = self.mp_face_mesh.FaceMesh(
+                static_image_mode=False,
+                max_num_faces=1,
+                refine_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
         self.mp_drawing = mp.solutions.drawing_utils
-        
-        # Key landmark indices for gesture detection
-        self.EYE_INDICES = {
-            'left': [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246],
-            'right': [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398]
-        }
-        self.MOUTH_INDICES = [61, 146, 91, 181, 84, 17, 314, 405, 320, 307, 375, 321, 308, 324, 318]
-        self.EYEBROW_INDICES = {
-            'left': [107, 55, 65, 52, 53, 46],
-            'right': [336, 296, 334, 293, 300, 276]
-        }
     
-    def detect(self, frame: np.ndarray) -> Optional[List]:
-        """Detect face landmarks in frame"""
+    def detect(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """Detect face landmarks in frame as an (N, 478, 3) array"""
         if not MEDIAPIPE_AVAILABLE or self.face_mesh is None:
             return None
         
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb_frame)
-        
-        if results.multi_face_landmarks:
-            return results.multi_face_landmarks[0]
-        return None
+        return self.detect_rgb(rgb_frame)
     
-    def get_eye_aspect_ratio(self, landmarks) -> Tuple[float, float]:
-        """Calculate Eye Aspect Ratio (EAR) for blink detection"""
-        def calculate_ear(eye_indices):
-            # Get eye landmark coordinates
-            eye_points = []
-            for idx in eye_indices:
-                if idx < len(landmarks.landmark):
-                    x = landmarks.landmark[idx].x
-                    y = landmarks.landmark[idx].y
-                    eye_points.append((x, y))
-            
-            if len(eye_points) < 6:
-                return 0.0
-            
-            # Calculate distances
-            # Vertical distances
-            v1 = np.linalg.norm(np.array(eye_points[1]) - np.array(eye_points[5]))
-            v2 = np.linalg.norm(np.array(eye_points[2]) - np.array(eye_points[4]))
-            # Horizontal distance
-            h = np.linalg.norm(np.array(eye_points[0]) - np.array(eye_points[3]))
-            
-            if h == 0:
-                return 0.0
-            
-            ear = (v1 + v2) / (2.0 * h)
-            return ear
-        
-        left_ear = calculate_ear(self.EYE_INDICES['left'])
-        right_ear = calculate_ear(self.EYE_INDICES['right'])
+    def detect_rgb(self, rgb_frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Detect face landmarks in an already converted RGB frame
+        Returns normalized (x, y, z) per landmark as an (N, 478, 3) float32
+        array, or None when no face is found
+        In tracking mode the previous frame's landmarks select a crop; if the
+        face is lost inside the crop the same frame is retried at full size
+        """
+        if not MEDIAPIPE_AVAILABLE or self.face_mesh is None:
+            return None
         
-        return left_ear, right_ear
-    
-    def get_mouth_open_ratio(self, landmarks) -> float:
-        """Calculate mouth openness ratio"""
-        if not landmarks:
-            return 0.0
+        height, width = rgb_frame.shape[:2]
+        landmarks = None
         
-        # Key mouth points
-        upper_lip = landmarks.landmark[13].y
-        lower_lip = landmarks.landmark[14].y
-        mouth_corner_left = landmarks.landmark[61].y
-        mouth_corner_right = landmarks.landmark[291].y
+        self.last_mode = 'full'
         
-        # Vertical distance (mouth opening)
-        vertical_dist = abs(upper_lip - lower_lip)
-        # Horizontal distance (mouth width)
-        horizontal_dist = abs(mouth_corner_left - mouth_corner_right)
+        if self.tracking and self.roi is not None and self.roi_face_mesh is not None:
+            landmarks = self._detect_roi(rgb_frame, self.roi)
+            self.last_mode = 'roi' if landmarks is not None else 'roi_miss'
         
-        if horizontal_dist == 0:
-            return 0.0
+        if landmarks is None:
+            results = self.face_mesh.process(rgb_frame)
+            if results.multi_face_landmarks:
+                landmarks = landmark_lists_to_array(results.multi_face_landmarks)
         
-        return vertical_dist / horizontal_dist
+        self.roi = self._next_roi(landmarks, width, height) if self.tracking else None
+        return landmarks
     
-    def get_smile_ratio(self, landmarks) -> float:
-        """Calculate smile curvature ratio"""
-        if not landmarks:
-            return 0.0
-        
-        # Mouth corner points
-        left_corner = np.array([landmarks.landmark[61].x, landmarks.landmark[61].y])
-        right_corner = np.array([landmarks.landmark[291].x, landmarks.landmark[291].y])
-        mouth_center = np.array([landmarks.landmark[13].x, landmarks.landmark[13].y])
-        
-        # Calculate curvature
-        left_to_center = np.linalg.norm(left_corner - mouth_center)
-        right_to_center = np.linalg.norm(right_corner - mouth_center)
-        corner_distance = np.linalg.norm(left_corner - right_corner)
-        
-        if corner_distance == 0:
-            return 0.0
+    def _detect_roi(self, rgb_frame: np.ndarray, roi: Tuple[int, int, int]) -> Optional[np.ndarray]:
+        """Run FaceMesh on the ROI crop and map landmarks back to full-frame coordinates"""
+        height, width = rgb_frame.shape[:2]
+        x0, y0, side = roi
+        crop = rgb_frame[y0:y0 + side, x0:x0 + side]
+        interpolation = cv2.INTER_AREA if side > self.roi_size else cv2.INTER_LINEAR
+        crop = cv2.resize(crop, (self.roi_size, self.roi_size), interpolation=interpolation)
+        
+        results = self.roi_face_mesh.process(crop)
+        if not results.multi_face_landmarks:
+            return None
         
-        # Smile ratio: higher when corners are further from center
-        smile_ratio = (left_to_center + right_to_center) / corner_distance
-        return smile_ratio
+        landmarks = landmark_lists_to_array(results.multi_face_landmarks)
+        # z shares the x scale in MediaPipe
+        scale = np.array([side / width, side / height, side / width], np.float32)
+        offset = np.array([x0 / width, y0 / height, 0.0], np.float32)
+        landmarks *= scale
+        landmarks += offset
+        return landmarks
     
-    def get_eyebrow_raise(self, landmarks) -> Tuple[bool, bool]:
-        """Detect eyebrow raise (simplified)"""
-        if not landmarks:
-            return False, False
+    def _next_roi(self, landmarks: Optional[np.ndarray], width: int,
+                  height: int) -> Optional[Tuple[int, int, int]]:
+        """Padded square around the first face, or None to detect on the full frame"""
+        if landmarks is None:
+            return None
         
-        # Compare eyebrow position to eye position
-        # Simplified: check if eyebrow landmarks are higher than normal
-        left_eyebrow_y = landmarks.landmark[107].y
-        right_eyebrow_y = landmarks.landmark[336].y
-        left_eye_y = landmarks.landmark[33].y
-        right_eye_y = landmarks.landmark[362].y
+        x_min, y_min = landmarks[0, :, :2].min(axis=0) * (width, height)
+        x_max, y_max = landmarks[0, :, :2].max(axis=0) * (width, height)
         
-        left_raised = left_eyebrow_y < left_eye_y - 0.02
-        right_raised = right_eyebrow_y < right_eye_y - 0.02
+        side = int(max(x_max - x_min, y_max - y_min) * (1.0 + 2.0 * self.roi_padding))
+        side = max(side, ROI_MIN_SIDE)
+        if side >= min(width, height):
+            return None  # Face fills the frame; cropping would not save anything
         
-        return left_raised, right_raised
+        # Center the box on the face, shifted back inside the frame at the edges
+        x0 = int((x_min + x_max) / 2.0 - side / 2.0)
+        y0 = int((y_min + y_max) / 2.0 - side / 2.0)
+        x0 = min(max(x0, 0), width - side)
+        y0 = min(max(y0, 0), height - side)
+        return x0, y0, side
+    
+    def reset_tracking(self):
+        """Forget the ROI so the next frame is searched in full"""
+        self.roi = None
+    
+    def close(self):
+        """Release the FaceMesh graphs"""
+        if self.face_mesh is not None:
+            self.face_mesh.close()
+            self.face_mesh = None
+        if self.roi_face_mesh is not None:
+            self.roi_face_mesh.close()
+            self.roi_face_mesh = None
 
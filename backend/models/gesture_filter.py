@@ -0,0 +1,133 @@
+"""
+Temporal gesture filter: exponential smoothing, hysteresis and minimum hold
+Works on the continuous signal behind each gesture (eye aspect ratio, mouth
+ratio, hands-up count, ...) so triggers stay stable at low inference rates
+"""
+
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """
+    Filter settings for one gesture
+    The gesture turns on when the smoothed signal crosses `on` and off when
+    it crosses back over `off` (below them when `below` is set). `tau` is the
+    smoothing time constant in seconds and `min_hold` the minimum time a state
+    is kept once entered; both are time-based so they do not depend on fps.
+    """
+    on: float
+    off: float
+    tau: float = 0.1
+    min_hold: float = 0.2
+    below: bool = False
+
+
+DEFAULT_FILTERS: Dict[str, FilterSpec] = {
+    # Eye aspect ratio drops during a blink; little smoothing, short hold
+    'blink': FilterSpec(on=0.21, off=0.25, tau=0.03, min_hold=0.15, below=True),
+    'smile': FilterSpec(on=0.5, off=0.45, tau=0.1, min_hold=0.3),
+    'mouth_open': FilterSpec(on=0.3, off=0.25, tau=0.08, min_hold=0.2),
+    # Brow height above the eye corner, normalized to frame height
+    'eyebrow_raise': FilterSpec(on=0.02, off=0.015, tau=0.1, min_hold=0.3),
+    # Number of raised hands
+    'raise_hand': FilterSpec(on=0.6, off=0.4, tau=0.15, min_hold=0.3),
+    'both_hands_up': FilterSpec(on=1.6, off=1.4, tau=0.15, min_hold=0.3),
+    # Horizontal nose offset from the shoulder midpoint
+    'head_tilt': FilterSpec(on=0.15, off=0.12, tau=0.2, min_hold=0.5),
+}
+
+
+def load_filter_config(config_path: Optional[str] = None) -> Dict[str, FilterSpec]:
+    """Default filters overridden by the "gesture_filters" section of configs/gestures.json"""
+    if config_path is None:
+        config_path = os.path.join(
+            Path(__file__).parent.parent.parent,
+            "configs",
+            "gestures.json"
+        )
+
+    filters = dict(DEFAULT_FILTERS)
+    try:
+        with open(config_path, 'r') as f:
+            overrides = json.load(f).get("gesture_filters", {})
+    except (OSError, ValueError) as e:
+        print(f"Error loading gesture filter config: {e}")
+        return filters
+
+    for name, settings in overrides.items():
+        base = filters.get(name)
+        try:
+            filters[name] = replace(base, **settings) if base is not None else FilterSpec(**settings)
+        except TypeError as e:
+            print(f"Invalid filter settings for {name}: {e}")
+    return filters
+
+
+class GestureFilter:
+    """Per-stream filter state for every configured gesture"""
+
+    def __init__(self, filters: Optional[Dict[str, FilterSpec]] = None):
+        self.filters = filters if filters is not None else load_filter_config()
+        self.values: Dict[str, float] = {}
+        self.states: Dict[str, bool] = {}
+        self._updated: Dict[str, float] = {}
+        self._changed: Dict[str, float] = {}
+
+    def update(self, signals: Dict[str, float], timestamp: Optional[float] = None) -> Dict[str, bool]:
+        """
+        Feed raw signals observed at timestamp (seconds) and return the
+        filtered state of each gesture that was fed
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        states = {}
+        for name, raw in signals.items():
+            spec = self.filters.get(name)
+            if spec is None:
+                continue
+            states[name] = self._step(name, spec, float(raw), now)
+        return states
+
+    def _step(self, name: str, spec: FilterSpec, raw: float, now: float) -> bool:
+        last = self._updated.get(name)
+        if last is None or spec.tau <= 0:
+            value = raw
+        else:
+            # alpha from elapsed time, so a slow stream is smoothed as much as a fast one
+            alpha = 1.0 - math.exp(-max(0.0, now - last) / spec.tau)
+            value = self.values[name] + alpha * (raw - self.values[name])
+        self.values[name] = value
+        self._updated[name] = now
+
+        active = self.states.get(name, False)
+        if now - self._changed.get(name, -math.inf) < spec.min_hold:
+            return active
+
+        if spec.below:
+            target = value < spec.on if not active else value < spec.off
+        else:
+            target = value > spec.on if not active else value > spec.off
+        if target != active:
+            self.states[name] = target
+            self._changed[name] = now
+        return target
+
+    def release(self, names):
+        """Turn gestures off immediately when their source is lost (e.g. no face)"""
+        for name in names:
+            self.values.pop(name, None)
+            self._updated.pop(name, None)
+            if self.states.pop(name, False):
+                self._changed.pop(name, None)
+
+    def reset(self):
+        self.values.clear()
+        self.states.clear()
+        self._updated.clear()
+        self._changed.clear()
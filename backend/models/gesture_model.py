@@ -3,23 +3,144 @@ Gesture detection model combining face and hand detection
 Detects: blink, smile, hand raise, mouth open, head tilt, eyebrow raise
 """
 
+import os
+import time
 import cv2
 import numpy as np
-from typing import Dict, Optional
-from .face_detect import FaceDetector, MEDIAPIPE_AVAILABLE
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .face_detect import FaceDetector, MEDIAPIPE_AVAILABLE, compute_face_centers, compute_face_features
+from .gesture_filter import FilterSpec, GestureFilter
+from .landmarks import (
+    LandmarkRecorder, ReplayBackend, landmark_lists_to_array,
+    POSE_NOSE, POSE_LEFT_SHOULDER, POSE_RIGHT_SHOULDER
+)
 
 try:
     import mediapipe as mp
 except ImportError:
     mp = None
 
+# Bit order of the gesture mask (bit i set <=> GESTURE_NAMES[i] is active)
+GESTURE_NAMES = (
+    'blink',
+    'smile',
+    'raise_hand',
+    'both_hands_up',
+    'head_tilt',
+    'mouth_open',
+    'eyebrow_raise'
+)
+GESTURE_BITS = {name: 1 << i for i, name in enumerate(GESTURE_NAMES)}
+
+# Run each model every Nth frame: blinks need every frame, hands and pose
+# move slowly. Phases stagger hands and pose so they never share a frame.
+DEFAULT_SCHEDULE = {'face_mesh': 1, 'hands': 2, 'pose': 4}
+SCHEDULE_PHASE = {'face_mesh': 0, 'hands': 1, 'pose': 2}
+MAX_INTERVAL = 8
+
+# Motion gate: reuse the last gestures while no MOTION_TILE-pixel tile of the
+# downsampled grayscale frame, or of the last face box, differs from the last
+# processed frame by this mean absolute difference (0-255 gray levels;
+# 0 disables), for at most MOTION_MAX_SKIP frames. The face is compared at its
+# own resolution so blinks and mouth movements are never averaged away.
+MOTION_THRESHOLD = float(os.environ.get("RG_MOTION_THRESHOLD", 2.0))
+MOTION_MAX_SKIP = int(os.environ.get("RG_MOTION_MAX_SKIP", 10))
+MOTION_SIZE = (64, 48)
+MOTION_FACE_SIZE = (64, 64)
+MOTION_TILE = 8
+
+# Gestures driven by each model, released when the model sees nothing
+STAGE_GESTURES = {
+    'face_mesh': ('blink', 'smile', 'mouth_open', 'eyebrow_raise'),
+    'hands': ('raise_hand', 'both_hands_up'),
+    'pose': ('head_tilt',),
+}
+
+# Models slowed down first when over budget (and restored last)
+ADAPT_ORDER = ('pose', 'hands', 'face_mesh')
+
+
+def tile_difference(a: np.ndarray, b: np.ndarray, tile: int = MOTION_TILE) -> float:
+    """Largest per-tile mean absolute difference of two grayscale images"""
+    diff = cv2.absdiff(a, b)
+    th, tw = diff.shape[0] // tile, diff.shape[1] // tile
+    tiles = diff[:th * tile, :tw * tile].reshape(th, tile, tw, tile)
+    return float(tiles.mean(axis=(1, 3), dtype=np.float32).max())
+
+
+def parse_schedule(spec: Optional[str]) -> Dict[str, int]:
+    """Parse "face_mesh=1,hands=2,pose=4" into a schedule, keeping defaults for the rest"""
+    schedule = dict(DEFAULT_SCHEDULE)
+    for item in (spec or "").split(","):
+        stage, _, interval = item.partition("=")
+        stage = stage.strip()
+        if stage in schedule and interval.strip().isdigit():
+            schedule[stage] = min(MAX_INTERVAL, max(1, int(interval)))
+    return schedule
+
 class GestureDetector:
     """Main gesture detection class using MediaPipe"""
     
-    def __init__(self):
+    GESTURE_NAMES = GESTURE_NAMES
+    
+    def __init__(self, parallel: bool = True, schedule: Optional[Dict[str, int]] = None,
+                 frame_budget: Optional[float] = None,
+                 filters: Optional[Dict[str, FilterSpec]] = None,
+                 motion_threshold: float = MOTION_THRESHOLD, motion_max_skip: int = MOTION_MAX_SKIP,
+                 replay: Optional[ReplayBackend] = None):
         self.face_detector = FaceDetector()
         
-        if not MEDIAPIPE_AVAILABLE or mp is None:
+        # Recorded landmarks replace the live graphs when replaying
+        # (RG_LANDMARK_REPLAY=recording.rglm); frame contents are then ignored
+        if replay is None and os.environ.get("RG_LANDMARK_REPLAY"):
+            replay = ReplayBackend.open(os.environ["RG_LANDMARK_REPLAY"])
+        self.replay = replay
+        self.recorder: Optional[LandmarkRecorder] = None
+        if replay is not None:
+            motion_threshold = 0.0
+        
+        # Motion gate state; skipped_frames counts frames answered from the gate
+        self.motion_threshold = motion_threshold
+        self.motion_max_skip = motion_max_skip
+        self.skipped_frames = 0
+        self.last_skipped = False
+        self._motion_ref: Optional[Tuple[Any, Tuple[np.ndarray, ...]]] = None
+        self._motion_skips = 0
+        # Normalized (x0, y0, x1, y1) box of the first face, None while no face is seen
+        self._face_box: Optional[Tuple[float, float, float, float]] = None
+        
+        # Smoothing, hysteresis and hold times per gesture (configs/gestures.json)
+        self.filter = GestureFilter(filters)
+        self.last_gestures: Dict[str, bool] = {}
+        self.last_face_gestures: List[Dict[str, bool]] = []
+        
+        # Normalized (x, y) anchors of the first face ('mouth', 'face') for
+        # effects that follow it; empty while no face is seen
+        self.last_centers: Dict[str, Tuple[float, float]] = {}
+        
+        # Per-stage wall time of the models run by the last detect_all call, in seconds
+        self.last_timings: Dict[str, float] = {}
+        # FaceDetector.last_mode of the last face mesh pass, None when face mesh did not run
+        self.last_face_mode: Optional[str] = None
+        
+        # Staggered model schedule; adapts within [base, MAX_INTERVAL] to stay
+        # inside frame_budget seconds of inference per frame (0 disables)
+        self.base_schedule = dict(schedule or parse_schedule(os.environ.get("RG_MODEL_SCHEDULE")))
+        self.schedule = dict(self.base_schedule)
+        if frame_budget is None:
+            frame_budget = float(os.environ.get("RG_GESTURE_BUDGET_MS", 0)) / 1000.0
+        self.frame_budget = frame_budget
+        self.frame_index = 0
+        self.cost_ema = 0.0
+        self._adapt_cooldown = 0
+        self._ran_stages: set = set()
+        
+        # One dedicated thread per MediaPipe graph when running in parallel;
+        # each graph is only ever touched by its own thread
+        self._model_executors: Dict[str, ThreadPoolExecutor] = {}
+        
+        if replay is not None or not MEDIAPIPE_AVAILABLE or mp is None:
             self.hands = None
             self.pose = None
             self.mp_hands = None
@@ -43,21 +164,17 @@ class GestureDetector:
             min_tracking_confidence=0.5
         )
         
-        # Thresholds
-        self.BLINK_THRESHOLD = 0.25
-        self.SMILE_THRESHOLD = 0.5
-        self.MOUTH_OPEN_THRESHOLD = 0.3
-        self.EYEBROW_RAISE_THRESHOLD = True  # Boolean check
-        
-        # State tracking for debouncing
-        self.last_gestures = {}
-        self.blink_counter = 0
-        self.blink_threshold_frames = 3
+        if parallel:
+            for stage in DEFAULT_SCHEDULE:
+                self._model_executors[stage] = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f"mediapipe-{stage}"
+                )
     
-    def detect_all(self, frame_data: str) -> Dict[str, bool]:
+    def detect_all(self, frame_data: str, timestamp: Optional[float] = None) -> Dict[str, bool]:
         """
         Detect all gestures from frame data
-        frame_data can be base64 encoded image or numpy array
+        frame_data can be base64 encoded image or numpy array; timestamp is the
+        frame time in seconds for the temporal filter (default: now)
         """
         # Decode frame if needed
         if isinstance(frame_data, str):
@@ -72,118 +189,324 @@ class GestureDetector:
         else:
             frame = frame_data
         
-        if frame is None:
-            return self._empty_gestures()
+        if self.replay is not None:
+            replay_time = self.replay.advance()
+            if timestamp is None:
+                timestamp = replay_time
+            rgb_frame = None
+        else:
+            if frame is None:
+                return self._empty_gestures()
+            
+            self.last_skipped = self._motion_gated(frame)
+            if self.last_skipped:
+                self.skipped_frames += 1
+                self.last_timings = {}
+                self.last_face_mode = None
+                return dict(self.last_gestures)
+            
+            # Convert once; all scheduled graphs read the same immutable RGB buffer
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            rgb_frame.flags.writeable = False
+        
+        if timestamp is None:
+            timestamp = time.monotonic()
         
-        gestures = {}
+        stages = self._due_stages()
+        start = time.perf_counter()
+        results = self._run_models(rgb_frame, stages)
+        self._adapt_schedule(time.perf_counter() - start)
+        self.frame_index += 1
+        
+        self._ran_stages.update(results)
+        if self.recorder is not None:
+            self.recorder.append(timestamp, results)
+        
+        signals: Dict[str, float] = {}
         
         # Face-based gestures
-        face_landmarks = self.face_detector.detect(frame)
-        if face_landmarks:
-            gestures.update(self._detect_face_gestures(face_landmarks))
-        else:
-            gestures.update(self._empty_face_gestures())
+        if 'face_mesh' in results:
+            face_landmarks = results['face_mesh']
+            if face_landmarks is not None:
+                signals.update(self._face_signals(face_landmarks))
+                self.last_centers = {
+                    name: (float(xy[0, 0]), float(xy[0, 1]))
+                    for name, xy in compute_face_centers(face_landmarks).items()
+                }
+                x_min, y_min = face_landmarks[0, :, :2].min(axis=0)
+                x_max, y_max = face_landmarks[0, :, :2].max(axis=0)
+                self._face_box = (float(x_min), float(y_min), float(x_max), float(y_max))
+            else:
+                self.last_face_gestures = []
+                self.last_centers = {}
+                self._face_box = None
+                self.filter.release(STAGE_GESTURES['face_mesh'])
         
         # Hand-based gestures
-        gestures.update(self._detect_hand_gestures(frame))
+        if 'hands' in results:
+            signals.update(self._hand_signals(results['hands']))
         
         # Head tilt
-        gestures.update(self._detect_head_tilt(frame))
+        if 'pose' in results:
+            signals.update(self._head_tilt_signals(results['pose']))
+        
+        # Only fresh measurements feed the filter; skipped models keep their state
+        self.filter.update(signals, timestamp)
+        gestures = self._empty_gestures()
+        gestures.update({name: self.filter.states.get(name, False) for name in gestures})
         
         # Update state
         self.last_gestures = gestures
         
         return gestures
     
-    def _detect_face_gestures(self, landmarks) -> Dict[str, bool]:
-        """Detect face-based gestures"""
-        gestures = {}
-        
-        # Blink detection
-        left_ear, right_ear = self.face_detector.get_eye_aspect_ratio(landmarks)
-        avg_ear = (left_ear + right_ear) / 2.0
+    def _motion_gated(self, frame: np.ndarray) -> bool:
+        """True when frame is close enough to the last processed frame to reuse its gestures"""
+        if self.motion_threshold <= 0:
+            return False
         
-        if avg_ear < self.BLINK_THRESHOLD:
-            self.blink_counter += 1
-            if self.blink_counter >= self.blink_threshold_frames:
-                gestures['blink'] = True
+        if self._motion_ref is not None and self._motion_skips < self.motion_max_skip:
+            box, reference = self._motion_ref
+            views = self._motion_views(frame, box)
+            if len(views) == len(reference) and all(
+                tile_difference(view, ref) < self.motion_threshold
+                for view, ref in zip(views, reference)
+            ):
+                self._motion_skips += 1
+                return True
+            if box != self._face_box:
+                views = self._motion_views(frame, self._face_box)
         else:
-            self.blink_counter = 0
-            gestures['blink'] = False
+            views = self._motion_views(frame, self._face_box)
         
-        # Smile detection
-        smile_ratio = self.face_detector.get_smile_ratio(landmarks)
-        gestures['smile'] = smile_ratio > self.SMILE_THRESHOLD
+        # Compare later frames against this one, the last frame actually processed
+        self._motion_ref = (self._face_box, views)
+        self._motion_skips = 0
+        return False
+    
+    @staticmethod
+    def _motion_views(frame: np.ndarray, box: Optional[Tuple[float, float, float, float]]
+                      ) -> Tuple[np.ndarray, ...]:
+        """Grayscale thumbnails of the whole frame and, when given, of the face box"""
+        views = [cv2.resize(frame, MOTION_SIZE, interpolation=cv2.INTER_AREA)]
+        if box is not None:
+            h, w = frame.shape[:2]
+            x0, y0 = max(int(box[0] * w), 0), max(int(box[1] * h), 0)
+            x1, y1 = min(int(box[2] * w) + 1, w), min(int(box[3] * h) + 1, h)
+            if x1 > x0 and y1 > y0:
+                views.append(cv2.resize(frame[y0:y1, x0:x1], MOTION_FACE_SIZE,
+                                        interpolation=cv2.INTER_AREA))
+        return tuple(cv2.cvtColor(view, cv2.COLOR_BGR2GRAY) for view in views)
+    
+    def _due_stages(self) -> Tuple[str, ...]:
+        """Models scheduled for this frame; a model with no held result always runs"""
+        return tuple(
+            stage for stage, interval in self.schedule.items()
+            if stage not in self._ran_stages
+            or (self.frame_index + SCHEDULE_PHASE.get(stage, 0)) % interval == 0
+        )
+    
+    def _adapt_schedule(self, elapsed: float):
+        """
+        Stretch the schedule while inference overruns the frame budget and
+        restore it once there is comfortable headroom
+        """
+        if self.frame_budget <= 0:
+            return
+        self.cost_ema = elapsed if self.cost_ema == 0.0 else 0.8 * self.cost_ema + 0.2 * elapsed
+        if self._adapt_cooldown > 0:
+            self._adapt_cooldown -= 1
+            return
         
-        # Mouth open detection
-        mouth_ratio = self.face_detector.get_mouth_open_ratio(landmarks)
-        gestures['mouth_open'] = mouth_ratio > self.MOUTH_OPEN_THRESHOLD
+        if self.cost_ema > self.frame_budget:
+            for stage in ADAPT_ORDER:
+                if stage in self.schedule and self.schedule[stage] < MAX_INTERVAL:
+                    self.schedule[stage] = min(MAX_INTERVAL, self.schedule[stage] * 2)
+                    break
+            else:
+                return
+        elif self.cost_ema < self.frame_budget * 0.5:
+            for stage in reversed(ADAPT_ORDER):
+                if stage in self.schedule and self.schedule[stage] > self.base_schedule[stage]:
+                    self.schedule[stage] = max(self.base_schedule[stage], self.schedule[stage] // 2)
+                    break
+            else:
+                return
+        else:
+            return
+        # Let the average settle over a full cycle before adapting again
+        self._adapt_cooldown = max(self.schedule.values())
+    
+    def _run_models(self, rgb_frame: Optional[np.ndarray], stages: Tuple[str, ...]) -> Dict[str, Any]:
+        """
+        Run the scheduled models among face mesh, hands and pose on one RGB frame
+        Each returns an (N, points, 3) landmark array or None. With per-graph
+        threads they run concurrently (MediaPipe releases the GIL inside its
+        calculators), so latency approaches the slowest model
+        """
+        if self.replay is not None:
+            models: Dict[str, Optional[Callable[[np.ndarray], Any]]] = self.replay.models()
+        else:
+            models = {
+                'face_mesh': self.face_detector.detect_rgb,
+                'hands': self._process_hands if self.hands is not None else None,
+                'pose': self._process_pose if self.pose is not None else None,
+            }
+        timings: Dict[str, float] = {}
         
-        # Eyebrow raise
-        left_raised, right_raised = self.face_detector.get_eyebrow_raise(landmarks)
-        gestures['eyebrow_raise'] = left_raised or right_raised
+        if self._model_executors:
+            futures = {
+                stage: self._model_executors[stage].submit(self._timed, timings, stage, models[stage], rgb_frame)
+                for stage in stages if models.get(stage) is not None
+            }
+            results = {stage: future.result() for stage, future in futures.items()}
+        else:
+            results = {
+                stage: self._timed(timings, stage, models[stage], rgb_frame)
+                for stage in stages if models.get(stage) is not None
+            }
         
-        return gestures
-    
-    def _detect_hand_gestures(self, frame) -> Dict[str, bool]:
-        """Detect hand-based gestures"""
-        if self.hands is None:
-            return {'raise_hand': False, 'both_hands_up': False}
+        # Models without a graph still produce (empty) results
+        for stage in stages:
+            results.setdefault(stage, None)
         
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        self.last_timings = timings
+        self.last_face_mode = None
+        if self.replay is None and 'face_mesh' in timings:
+            self.last_face_mode = self.face_detector.last_mode
+        return results
+    
+    def _process_hands(self, rgb_frame: np.ndarray) -> Optional[np.ndarray]:
         results = self.hands.process(rgb_frame)
-        
-        gestures = {
-            'raise_hand': False,
-            'both_hands_up': False
+        if not results.multi_hand_landmarks:
+            return None
+        return landmark_lists_to_array(results.multi_hand_landmarks)
+    
+    def _process_pose(self, rgb_frame: np.ndarray) -> Optional[np.ndarray]:
+        results = self.pose.process(rgb_frame)
+        if not results.pose_landmarks:
+            return None
+        return landmark_lists_to_array([results.pose_landmarks])
+    
+    @staticmethod
+    def _timed(timings: Dict[str, float], stage: str, fn: Callable[[np.ndarray], Any],
+               rgb_frame: np.ndarray) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(rgb_frame)
+        finally:
+            timings[stage] = time.perf_counter() - start
+    
+    def detect_mask(self, frame_data, timestamp: Optional[float] = None) -> int:
+        """Detect all gestures and return them as a GESTURE_BITS bitmask"""
+        return self.gestures_to_mask(self.detect_all(frame_data, timestamp))
+    
+    @staticmethod
+    def gestures_to_mask(gestures: Dict[str, bool]) -> int:
+        """Pack a gesture dict into a bitmask"""
+        mask = 0
+        for name, active in gestures.items():
+            if active and name in GESTURE_BITS:
+                mask |= GESTURE_BITS[name]
+        return mask
+    
+    @staticmethod
+    def mask_to_gestures(mask: int) -> Dict[str, bool]:
+        """Unpack a bitmask into a gesture dict"""
+        return {name: bool(mask & bit) for name, bit in GESTURE_BITS.items()}
+    
+    def start_recording(self, path: str):
+        """Record the landmarks of every processed frame to path"""
+        self.stop_recording()
+        self.recorder = LandmarkRecorder(path)
+    
+    def stop_recording(self):
+        """Write and close the current recording, if any"""
+        if self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            recorder.close()
+    
+    def reset(self):
+        """Clear per-session tracking state so the detector can be reused"""
+        self.last_gestures = {}
+        self.last_face_gestures = []
+        self.last_centers = {}
+        self.filter.reset()
+        self.frame_index = 0
+        self.cost_ema = 0.0
+        self._adapt_cooldown = 0
+        self.schedule = dict(self.base_schedule)
+        self._ran_stages = set()
+        self._motion_ref = None
+        self._motion_skips = 0
+        self._face_box = None
+        self.last_skipped = False
+        self.last_face_mode = None
+        self.face_detector.reset_tracking()
+        if self.replay is not None:
+            self.replay.reset()
+    
+    def close(self):
+        """Stop the per-graph threads and release MediaPipe graphs"""
+        self.stop_recording()
+        for executor in self._model_executors.values():
+            executor.shutdown(wait=True)
+        self._model_executors = {}
+        self.face_detector.close()
+        if self.hands is not None:
+            self.hands.close()
+            self.hands = None
+        if self.pose is not None:
+            self.pose.close()
+            self.pose = None
+    
+    def _face_signals(self, landmarks: np.ndarray) -> Dict[str, float]:
+        """
+        Continuous face signals for every face in an (N, 478, 3) array
+        Each signal is taken from the face showing the gesture most strongly;
+        unfiltered per-face results land in last_face_gestures
+        """
+        features = compute_face_features(landmarks)
+        per_face = {
+            'blink': features['ear'].mean(axis=1),
+            'smile': features['smile'],
+            'mouth_open': features['mouth_open'],
+            'eyebrow_raise': features['eyebrow_height'].max(axis=1),
         }
         
-        if results.multi_hand_landmarks:
-            hand_count = len(results.multi_hand_landmarks)
-            hands_up = 0
-            
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Check if hand is raised (wrist y < middle finger tip y)
-                wrist_y = hand_landmarks.landmark[0].y
-                middle_tip_y = hand_landmarks.landmark[12].y
-                
-                if wrist_y < middle_tip_y - 0.1:  # Hand is above
-                    hands_up += 1
-            
-            gestures['raise_hand'] = hands_up >= 1
-            gestures['both_hands_up'] = hands_up >= 2
-        
-        return gestures
+        filters = self.filter.filters
+        self.last_face_gestures = [
+            {name: bool(values[i] < filters[name].on if filters[name].below else values[i] > filters[name].on)
+             for name, values in per_face.items() if name in filters}
+            for i in range(landmarks.shape[0])
+        ]
+        return {
+            name: float(values.min() if name in filters and filters[name].below else values.max())
+            for name, values in per_face.items()
+        }
     
-    def _detect_head_tilt(self, frame) -> Dict[str, bool]:
-        """Detect head tilt using pose estimation"""
-        if self.pose is None:
-            return {'head_tilt': False}
+    def _hand_signals(self, landmarks: Optional[np.ndarray]) -> Dict[str, float]:
+        """Number of raised hands in an (N, 21, 3) array, for raise_hand and both_hands_up"""
+        hands_up = 0
         
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(rgb_frame)
+        if landmarks is not None:
+            # Hand is raised when the wrist is above the middle finger tip
+            wrist_y = landmarks[:, 0, 1]
+            middle_tip_y = landmarks[:, 12, 1]
+            hands_up = int(np.count_nonzero(wrist_y < middle_tip_y - 0.1))
         
-        gestures = {'head_tilt': False}
+        return {'raise_hand': float(hands_up), 'both_hands_up': float(hands_up)}
+    
+    def _head_tilt_signals(self, landmarks: Optional[np.ndarray]) -> Dict[str, float]:
+        """Horizontal nose offset from the shoulder midpoint, from a (1, 33, 3) pose array"""
+        signals = {'head_tilt': 0.0}
         
-        if results.pose_landmarks:
-            # Get nose and shoulder landmarks
-            nose = results.pose_landmarks.landmark[self.mp_pose.PoseLandmark.NOSE]
-            left_shoulder = results.pose_landmarks.landmark[self.mp_pose.PoseLandmark.LEFT_SHOULDER]
-            right_shoulder = results.pose_landmarks.landmark[self.mp_pose.PoseLandmark.RIGHT_SHOULDER]
-            
-            # Calculate tilt angle
-            shoulder_mid_x = (left_shoulder.x + right_shoulder.x) / 2
-            shoulder_mid_y = (left_shoulder.y + right_shoulder.y) / 2
-            
-            # Angle from vertical
-            dx = nose.x - shoulder_mid_x
-            dy = nose.y - shoulder_mid_y
-            
-            # Threshold for tilt detection
-            tilt_threshold = 0.15
-            gestures['head_tilt'] = abs(dx) > tilt_threshold
+        if landmarks is not None:
+            body = landmarks[0]
+            shoulder_mid_x = (body[POSE_LEFT_SHOULDER, 0] + body[POSE_RIGHT_SHOULDER, 0]) / 2
+            signals['head_tilt'] = float(abs(body[POSE_NOSE, 0] - shoulder_mid_x))
         
-        return gestures
+        return signals
     
     def _empty_gestures(self) -> Dict[str, bool]:
         """Return empty gesture dict"""
@@ -197,12 +520,4 @@ class GestureDetector:
             'eyebrow_raise': False
         }
     
-    def _empty_face_gestures(self) -> Dict[str, bool]:
-        """Return empty face gesture dict"""
-        return {
-            'blink': False,
-            'smile': False,
-            'mouth_open': False,
-            'eyebrow_raise': False
-        }
 
@@ -0,0 +1,200 @@
+"""
+Landmark recording and replay
+Recordings store the face, hands and pose landmark streams as columnar float32
+arrays in one memory-mapped file, indexed by frame, so everything downstream
+of detection can be benchmarked deterministically without MediaPipe
+"""
+
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+MAGIC = b"RGLMARK1"
+ALIGNMENT = 64
+
+# Landmarks per instance (face, hand, body) for each model
+STAGE_POINTS = {'face_mesh': 478, 'hands': 21, 'pose': 33}
+
+# Pose landmark indices used for head tilt
+POSE_NOSE = 0
+POSE_LEFT_SHOULDER = 11
+POSE_RIGHT_SHOULDER = 12
+
+# Instance count recorded for a model that did not run on a frame
+NOT_RUN = -1
+
+
+def landmark_lists_to_array(landmark_lists) -> np.ndarray:
+    """Convert MediaPipe landmark lists into an (N, points, 3) float32 array"""
+    count = sum(len(item.landmark) for item in landmark_lists)
+    flat = np.fromiter(
+        (value for item in landmark_lists for p in item.landmark for value in (p.x, p.y, p.z)),
+        np.float32, count * 3
+    )
+    return flat.reshape(len(landmark_lists), -1, 3)
+
+
+class LandmarkRecorder:
+    """
+    Collects per-frame landmarks and writes them to a recording on close
+    Each stage is stored as an instance count per frame (NOT_RUN when the
+    model was skipped), a row offset per frame and one float32 block of
+    (instances, points, 3) landmarks
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.timestamps: List[float] = []
+        self._counts: Dict[str, List[int]] = {stage: [] for stage in STAGE_POINTS}
+        self._chunks: Dict[str, List[np.ndarray]] = {stage: [] for stage in STAGE_POINTS}
+
+    @property
+    def frames(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, timestamp: float, results: Dict[str, Optional[np.ndarray]]):
+        """Record one frame; stages missing from results are marked as not run"""
+        self.timestamps.append(timestamp)
+        for stage, points in STAGE_POINTS.items():
+            if stage not in results:
+                self._counts[stage].append(NOT_RUN)
+                continue
+            landmarks = results[stage]
+            if landmarks is None or len(landmarks) == 0:
+                self._counts[stage].append(0)
+                continue
+            landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, points, 3)
+            self._counts[stage].append(len(landmarks))
+            self._chunks[stage].append(landmarks)
+
+    def close(self):
+        """Write the recording"""
+        arrays = {"timestamps": np.asarray(self.timestamps, dtype=np.float64)}
+        for stage, points in STAGE_POINTS.items():
+            counts = np.asarray(self._counts[stage], dtype=np.int32)
+            arrays[f"{stage}.counts"] = counts
+            arrays[f"{stage}.offsets"] = np.concatenate(
+                ([0], np.cumsum(np.maximum(counts, 0)))
+            ).astype(np.int64)
+            chunks = self._chunks[stage]
+            arrays[f"{stage}.landmarks"] = (
+                np.concatenate(chunks) if chunks else np.zeros((0, points, 3), np.float32)
+            )
+        write_arrays(self.path, arrays, {"frames": self.frames})
+
+
+def write_arrays(path: str, arrays: Dict[str, np.ndarray], meta: dict):
+    """Write named arrays after a JSON header, each aligned for memory mapping"""
+    entries = {}
+    offset = 0
+    for name, array in arrays.items():
+        entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({"meta": meta, "arrays": entries}).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + entries[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+class LandmarkReader:
+    """Memory-mapped read access to a recording"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a landmark recording: {path}")
+            header_len = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_len))
+        data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGNMENT) * ALIGNMENT
+
+        self.path = path
+        self.meta = header["meta"]
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, entry in header["arrays"].items():
+            shape = tuple(entry["shape"])
+            if int(np.prod(shape)) == 0:
+                self.arrays[name] = np.zeros(shape, dtype=entry["dtype"])
+            else:
+                self.arrays[name] = np.memmap(path, dtype=entry["dtype"], mode="r",
+                                              offset=data_start + entry["offset"], shape=shape)
+
+        self.timestamps = self.arrays["timestamps"]
+        self.frames = len(self.timestamps)
+
+        # Frame whose result stands in for each frame: the latest one at or
+        # before it on which the model ran (skipped frames reuse it)
+        self._source: Dict[str, np.ndarray] = {}
+        for stage in STAGE_POINTS:
+            counts = self.arrays[f"{stage}.counts"]
+            ran = np.where(counts != NOT_RUN, np.arange(self.frames), -1)
+            self._source[stage] = np.maximum.accumulate(ran) if self.frames else ran
+
+    def landmarks(self, stage: str, frame: int) -> Optional[np.ndarray]:
+        """Landmarks of a stage at a frame as an (N, points, 3) view, or None"""
+        source = int(self._source[stage][frame])
+        if source < 0:
+            return None
+        count = int(self.arrays[f"{stage}.counts"][source])
+        if count <= 0:
+            return None
+        start = int(self.arrays[f"{stage}.offsets"][source])
+        return self.arrays[f"{stage}.landmarks"][start:start + count]
+
+
+class ReplayBackend:
+    """
+    Stands in for the live MediaPipe graphs of a GestureDetector
+    Each detect call advances one recorded frame (looping at the end), and
+    the stage models return the recorded landmarks regardless of the image
+    """
+
+    def __init__(self, reader: LandmarkReader, loop: bool = True):
+        if reader.frames == 0:
+            raise ValueError(f"Empty landmark recording: {reader.path}")
+        self.reader = reader
+        self.loop = loop
+        self.frame = -1
+
+        # Timestamps keep increasing across loops, one frame interval apart
+        timestamps = reader.timestamps
+        span = float(timestamps[-1] - timestamps[0])
+        interval = span / (reader.frames - 1) if reader.frames > 1 and span > 0 else 1.0 / 30.0
+        self._period = span + interval
+        self._lap = 0
+
+    @classmethod
+    def open(cls, path: str, loop: bool = True) -> "ReplayBackend":
+        return cls(LandmarkReader(path), loop)
+
+    def advance(self) -> float:
+        """Move to the next recorded frame and return its timestamp"""
+        self.frame += 1
+        if self.frame >= self.reader.frames:
+            if self.loop:
+                self.frame = 0
+                self._lap += 1
+            else:
+                self.frame = self.reader.frames - 1
+        return float(self.reader.timestamps[self.frame]) + self._lap * self._period
+
+    def models(self) -> Dict[str, Callable[[Optional[np.ndarray]], Optional[np.ndarray]]]:
+        return {
+            stage: (lambda _frame, stage=stage: self.reader.landmarks(stage, self.frame))
+            for stage in STAGE_POINTS
+        }
+
+    def reset(self):
+        self.frame = -1
+        self._lap = 0
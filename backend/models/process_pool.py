@@ -0,0 +1,356 @@
+"""
+Process-based gesture inference with shared-memory frame hand-off
+MediaPipe holds the GIL for much of detect_all, so threads give roughly one
+core of throughput. This pool runs GestureDetectors in worker processes:
+decoded frames are copied into multiprocessing.shared_memory ring slots and
+only the slot index and the integer gesture mask cross the pipe.
+"""
+
+import asyncio
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import threading
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Large enough for a 1080p BGR frame; bigger frames are downscaled to fit
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 3
+
+# Crashed workers restart after an exponential backoff; a worker that dies
+# this many times in a row without producing a result is given up on
+RESTART_BACKOFF = 0.5
+MAX_RESTART_BACKOFF = 30.0
+MAX_RESTARTS = int(os.environ.get("RG_WORKER_MAX_RESTARTS", 5))
+
+
+def _worker_main(shm_name: str, slot_bytes: int, conn):
+    """Worker process loop: one GestureDetector per session it serves"""
+    from .gesture_model import GestureDetector
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    detectors: Dict[str, GestureDetector] = {}
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+
+            kind = message[0]
+            if kind == "detect":
+                _, request_id, session_id, slot, shape = message
+                frame = None
+                if slot is not None:
+                    # Zero-copy view; the parent does not reuse the slot
+                    # until this request's result has been received
+                    frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf,
+                                       offset=slot * slot_bytes)
+                try:
+                    detector = detectors.get(session_id)
+                    if detector is None:
+                        detector = detectors[session_id] = GestureDetector()
+                    mask = detector.detect_mask(frame)
+                    conn.send((request_id, (mask, detector.last_timings, detector.last_skipped,
+                                            detector.last_face_mode, detector.last_centers), None))
+                except Exception as e:
+                    conn.send((request_id, None, repr(e)))
+                finally:
+                    del frame
+            elif kind == "release":
+                detector = detectors.pop(message[1], None)
+                if detector is not None:
+                    detector.close()
+            elif kind == "stop":
+                break
+    finally:
+        for detector in detectors.values():
+            detector.close()
+        shm.close()
+
+
+class _Worker:
+    """Parent-side handle for one worker process and its ring of slots"""
+
+    def __init__(self, index: int, slots: int, slot_bytes: int):
+        self.index = index
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.process: Optional[mp.Process] = None
+        self.conn = None
+        self.reader: Optional[threading.Thread] = None
+        self.free_slots: Optional[asyncio.Queue] = None
+        self.pending: Dict[int, Tuple[asyncio.Future, Optional[int]]] = {}
+        self.sessions: set = set()
+        self.restarts = 0
+        # Deaths since the last successful result; drives backoff and give-up
+        self.failures = 0
+        self.restarting = False
+        self.failed = False
+        self._restart_handle: Optional[asyncio.TimerHandle] = None
+
+    def release_memory(self):
+        """Free the slot ring once no process uses it any more"""
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def slot_view(self, slot: int, shape: Tuple[int, ...]) -> np.ndarray:
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf,
+                          offset=slot * self.slot_bytes)
+
+
+class ProcessDetectorPool:
+    """
+    Pool of worker processes running GestureDetector
+    Sessions are pinned to one worker so their tracking state stays in one
+    process. Each worker owns a ring of shared-memory slots; a frame occupies
+    a slot until its result comes back. Crashed workers fail their in-flight
+    requests with RuntimeError and restart after an exponential backoff;
+    after MAX_RESTARTS consecutive deaths a worker is retired, its shared
+    memory freed and its sessions moved to the remaining workers.
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, slots_per_worker: int = 4,
+                 slot_bytes: int = DEFAULT_SLOT_BYTES,
+                 observer: Optional[Callable[[Dict[str, float], bool, Optional[str]], None]] = None):
+        self.observer = observer
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.slots_per_worker = slots_per_worker
+        self.slot_bytes = slot_bytes
+        self.workers: List[_Worker] = []
+        self.bindings: Dict[str, _Worker] = {}
+        # Latest face anchors per session (GestureDetector.last_centers)
+        self.centers: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        self._ctx = mp.get_context("spawn")
+        self._request_ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = False
+        self.queued = 0
+
+    def start(self):
+        """Spawn the worker processes (must be called from the event loop)"""
+        if self.workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        for index in range(self.num_workers):
+            worker = _Worker(index, self.slots_per_worker, self.slot_bytes)
+            self.workers.append(worker)
+            self._spawn(worker)
+        logger.info(f"Started {self.num_workers} gesture worker processes")
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._ctx.Pipe()
+        worker.conn = parent_conn
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.shm.name, worker.slot_bytes, child_conn),
+            name=f"gesture-worker-{worker.index}",
+            daemon=True
+        )
+        worker.process.start()
+        child_conn.close()
+
+        if worker.free_slots is None:
+            worker.free_slots = asyncio.Queue()
+            for slot in range(worker.slots):
+                worker.free_slots.put_nowait(slot)
+
+        worker.reader = threading.Thread(
+            target=self._read_results, args=(worker, parent_conn),
+            name=f"gesture-worker-{worker.index}-reader", daemon=True
+        )
+        worker.reader.start()
+
+    def _read_results(self, worker: _Worker, conn):
+        """Reader thread: forward results to the event loop until the pipe closes"""
+        try:
+            while True:
+                try:
+                    request_id, result, error = conn.recv()
+                except (EOFError, OSError):
+                    break
+                self._loop.call_soon_threadsafe(self._resolve, worker, request_id, result, error)
+            self._loop.call_soon_threadsafe(self._on_worker_exit, worker, conn)
+        except RuntimeError:
+            pass  # Event loop already closed during shutdown
+
+    def _resolve(self, worker: _Worker, request_id: int, result, error):
+        entry = worker.pending.pop(request_id, None)
+        if entry is None:
+            return
+        future, slot = entry
+        if slot is not None:
+            worker.free_slots.put_nowait(slot)
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(RuntimeError(f"Gesture worker error: {error}"))
+        else:
+            worker.failures = 0
+            mask, timings, skipped, face_mode, centers = result
+            if self.observer is not None:
+                self.observer(timings, skipped, face_mode)
+            future.set_result((mask, centers))
+
+    def _on_worker_exit(self, worker: _Worker, conn):
+        if conn is not worker.conn:
+            return  # Stale reader from a previous incarnation
+
+        for future, slot in worker.pending.values():
+            if slot is not None:
+                worker.free_slots.put_nowait(slot)
+            if not future.done():
+                future.set_exception(RuntimeError(f"Gesture worker {worker.index} exited"))
+        worker.pending.clear()
+
+        if self._closing:
+            return
+
+        exitcode = None
+        if worker.process is not None:
+            worker.process.join(timeout=1.0)
+            exitcode = worker.process.exitcode
+        worker.failures += 1
+
+        if worker.failures > MAX_RESTARTS:
+            worker.failed = True
+            worker.release_memory()
+            for session_id in list(worker.sessions):
+                self.bindings.pop(session_id, None)
+            worker.sessions.clear()
+            logger.error(
+                f"Gesture worker {worker.index} died {worker.failures} times in a row "
+                f"(exit code {exitcode}), giving up on it"
+            )
+            return
+
+        delay = min(MAX_RESTART_BACKOFF, RESTART_BACKOFF * 2 ** (worker.failures - 1))
+        logger.error(
+            f"Gesture worker {worker.index} died (exit code {exitcode}), "
+            f"restarting in {delay:.1f}s (restart #{worker.restarts + 1})"
+        )
+        worker.restarting = True
+        worker._restart_handle = self._loop.call_later(delay, self._restart, worker)
+
+    def _restart(self, worker: _Worker):
+        worker._restart_handle = None
+        worker.restarting = False
+        if self._closing:
+            return
+        worker.restarts += 1
+        # Tracking state died with the process; sessions rebuild it lazily
+        self._spawn(worker)
+
+    def _worker_for(self, session_id: str) -> _Worker:
+        worker = self.bindings.get(session_id)
+        if worker is None:
+            live = [w for w in self.workers if not w.failed]
+            if not live:
+                raise RuntimeError("All gesture workers failed")
+            worker = min(live, key=lambda w: len(w.sessions))
+            worker.sessions.add(session_id)
+            self.bindings[session_id] = worker
+        return worker
+
+    async def detect(self, session_id: str, frame: Optional[np.ndarray]) -> int:
+        """Run gesture detection for a session on its pinned worker, as a bitmask"""
+        if not self.workers:
+            self.start()
+
+        worker = self._worker_for(session_id)
+        if worker.restarting:
+            raise RuntimeError(f"Gesture worker {worker.index} is restarting")
+        slot, shape = None, None
+        if frame is not None:
+            frame = self._fit_to_slot(frame)
+            shape = frame.shape
+            # Wait for a free shared-memory slot on the session's worker
+            self.queued += 1
+            try:
+                slot = await worker.free_slots.get()
+            finally:
+                self.queued -= 1
+            # Only copy into shared memory; the pipe carries a tiny tuple
+            np.copyto(worker.slot_view(slot, shape), frame)
+
+        request_id = next(self._request_ids)
+        future = self._loop.create_future()
+        worker.pending[request_id] = (future, slot)
+        try:
+            worker.conn.send(("detect", request_id, session_id, slot, shape))
+        except (BrokenPipeError, OSError) as e:
+            worker.pending.pop(request_id, None)
+            if slot is not None:
+                worker.free_slots.put_nowait(slot)
+            raise RuntimeError(f"Gesture worker {worker.index} unavailable: {e}")
+        mask, self.centers[session_id] = await future
+        return mask
+
+    def get_centers(self, session_id: str) -> Dict[str, Tuple[float, float]]:
+        """Face anchors from the session's latest detection, normalized to [0, 1]"""
+        return self.centers.get(session_id, {})
+
+    def _fit_to_slot(self, frame: np.ndarray) -> np.ndarray:
+        if frame.dtype != np.uint8:
+            frame = frame.astype(np.uint8)
+        if frame.nbytes <= self.slot_bytes:
+            return frame
+        scale = (self.slot_bytes / frame.nbytes) ** 0.5
+        h, w = frame.shape[:2]
+        return cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    def release(self, session_id: str):
+        """Drop a session's detector in its worker process"""
+        worker = self.bindings.pop(session_id, None)
+        self.centers.pop(session_id, None)
+        if worker is None:
+            return
+        worker.sessions.discard(session_id)
+        try:
+            worker.conn.send(("release", session_id))
+        except (BrokenPipeError, OSError):
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        """Worker occupancy"""
+        return {
+            "workers": len(self.workers),
+            "bound_sessions": len(self.bindings),
+            "in_flight": sum(len(w.pending) for w in self.workers),
+            "queued": self.queued,
+            "restarts": sum(w.restarts for w in self.workers),
+            "failed_workers": sum(w.failed for w in self.workers),
+        }
+
+    def shutdown(self):
+        """Stop workers and free shared memory"""
+        self._closing = True
+        for worker in self.workers:
+            if worker._restart_handle is not None:
+                worker._restart_handle.cancel()
+            try:
+                worker.conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5.0)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+            worker.conn.close()
+            worker.release_memory()
+        self.workers = []
+        self.bindings = {}
+
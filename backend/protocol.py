@@ -0,0 +1,140 @@
+"""
+Binary WebSocket frame protocol for Reality Glitcher
+Frames are sent as a fixed little-endian header followed by the raw payload,
+which avoids the base64 inflation and extra copies of the JSON frame path
+"""
+
+import base64
+import binascii
+import struct
+import time
+from typing import NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Header layout (20 bytes, little-endian):
+#   magic     2s  b'RG'
+#   version   B
+#   format    B   one of FORMAT_*
+#   sequence  I   client frame counter
+#   timestamp d   client timestamp in milliseconds
+#   width     H   only used by raw formats
+#   height    H   only used by raw formats
+HEADER_FORMAT = "<2sBBIdHH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b"RG"
+VERSION = 1
+
+FORMAT_JPEG = 1
+FORMAT_WEBP = 2
+FORMAT_RGB = 3
+FORMAT_RGBA = 4
+
+ENCODED_FORMATS = (FORMAT_JPEG, FORMAT_WEBP)
+RAW_CHANNELS = {FORMAT_RGB: 3, FORMAT_RGBA: 4}
+
+_header = struct.Struct(HEADER_FORMAT)
+
+
+class ProtocolError(ValueError):
+    """Raised when a binary frame message is malformed"""
+
+
+class FrameHeader(NamedTuple):
+    """Parsed binary frame header"""
+    version: int
+    format: int
+    sequence: int
+    timestamp: float
+    width: int
+    height: int
+
+
+def pack_frame(payload: bytes, fmt: int = FORMAT_JPEG, sequence: int = 0,
+               timestamp: float = 0.0, width: int = 0, height: int = 0) -> bytes:
+    """Build a binary frame message from an encoded or raw payload"""
+    return _header.pack(MAGIC, VERSION, fmt, sequence, timestamp, width, height) + payload
+
+
+def unpack_header(data: bytes) -> FrameHeader:
+    """Parse the fixed header of a binary frame message"""
+    if len(data) < HEADER_SIZE:
+        raise ProtocolError(f"Frame message too short: {len(data)} bytes")
+
+    magic, version, fmt, sequence, timestamp, width, height = _header.unpack_from(data)
+    if magic != MAGIC:
+        raise ProtocolError(f"Bad frame magic: {magic!r}")
+    if version != VERSION:
+        raise ProtocolError(f"Unsupported frame protocol version: {version}")
+
+    return FrameHeader(version, fmt, sequence, timestamp, width, height)
+
+
+def decode_frame(data: bytes) -> Tuple[FrameHeader, Optional[np.ndarray]]:
+    """
+    Decode a binary frame message into its header and a BGR frame
+    The payload is viewed in place from the received buffer, so encoded
+    formats go straight into cv2.imdecode without an intermediate copy
+    """
+    header = unpack_header(data)
+    payload = np.frombuffer(data, dtype=np.uint8, offset=HEADER_SIZE)
+
+    if header.format in ENCODED_FORMATS:
+        return header, cv2.imdecode(payload, cv2.IMREAD_COLOR)
+
+    if header.format in RAW_CHANNELS:
+        channels = RAW_CHANNELS[header.format]
+        expected = header.width * header.height * channels
+        if expected == 0 or payload.size != expected:
+            raise ProtocolError(
+                f"Raw payload size {payload.size} does not match "
+                f"{header.width}x{header.height}x{channels}"
+            )
+        image = payload.reshape(header.height, header.width, channels)
+        code = cv2.COLOR_RGB2BGR if channels == 3 else cv2.COLOR_RGBA2BGR
+        return header, cv2.cvtColor(image, code)
+
+    raise ProtocolError(f"Unknown frame format: {header.format}")
+
+
+def decode_base64_frame(frame_data: str) -> Optional[np.ndarray]:
+    """Decode a legacy JSON-path frame (base64 image, optionally a data URL)"""
+    if frame_data.startswith("data:"):
+        frame_data = frame_data.split(",", 1)[-1]
+    try:
+        buffer = np.frombuffer(base64.b64decode(frame_data), dtype=np.uint8)
+    except (binascii.Error, ValueError):
+        return None
+    if buffer.size == 0:
+        return None
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+
+class GestureDeltaEncoder:
+    """
+    Decides which gesture masks go on the wire for one session
+    A gesture_event is emitted only when the mask changes, plus a periodic
+    keyframe so late joiners and lossy clients resynchronize
+    """
+
+    def __init__(self, keyframe_interval: float = 1.0):
+        self.keyframe_interval = keyframe_interval
+        # When disabled every frame is sent (per-frame acks for benchmarking)
+        self.enabled = True
+        self.last_mask: Optional[int] = None
+        self.last_keyframe = 0.0
+        self.suppressed = 0
+
+    def update(self, mask: int) -> Optional[bool]:
+        """Returns None when nothing needs sending, else whether it is a keyframe"""
+        now = time.monotonic()
+        if self.last_mask is None or now - self.last_keyframe >= self.keyframe_interval:
+            self.last_mask = mask
+            self.last_keyframe = now
+            return True
+        if mask != self.last_mask or not self.enabled:
+            self.last_mask = mask
+            return False
+        self.suppressed += 1
+        return None
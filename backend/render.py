@@ -0,0 +1,208 @@
+"""
+Server-side rendering: run EffectEngine on ingested frames and encode results
+Used by the WebSocket render mode and the MJPEG endpoint so clients without
+WebGPU still get effects
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from effects import create_effects
+from engine.core import EffectEngine
+from metrics import effect_latency
+from models.depth_estimator import DepthService
+
+logger = logging.getLogger(__name__)
+
+class CountingThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that counts calls submitted and started, for queue metrics"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._count_lock = threading.Lock()
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        def call():
+            with self._count_lock:
+                self.started += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._count_lock:
+                    self.completed += 1
+
+        with self._count_lock:
+            self.submitted += 1
+        try:
+            return super().submit(call)
+        except Exception:
+            with self._count_lock:
+                self.submitted -= 1
+            raise
+
+    @property
+    def waiting(self) -> int:
+        """Calls submitted but not yet picked up by a thread"""
+        return self.submitted - self.started
+
+    @property
+    def running(self) -> int:
+        return self.started - self.completed
+
+
+# Shared pools: frames are decoded on the decode pool, effects run on the
+# render pool, JPEG/WebP encoding on the encoder pool (all release the GIL
+# inside OpenCV)
+decode_pool = CountingThreadPoolExecutor(
+    max_workers=int(os.environ.get("RG_DECODE_THREADS", 0)) or os.cpu_count() or 1,
+    thread_name_prefix="decode"
+)
+render_pool = CountingThreadPoolExecutor(
+    max_workers=int(os.environ.get("RG_RENDER_THREADS", 0)) or os.cpu_count() or 1,
+    thread_name_prefix="render"
+)
+encoder_pool = CountingThreadPoolExecutor(
+    max_workers=int(os.environ.get("RG_ENCODER_THREADS", 0)) or os.cpu_count() or 1,
+    thread_name_prefix="encoder"
+)
+
+MIN_QUALITY = 30
+MAX_QUALITY = 90
+
+
+class SessionRenderer:
+    """
+    Per-session effect renderer with adaptive quality
+    Each session gets its own EffectEngine (effects keep per-stream state such
+    as frame history). Rendering is rate limited to max_fps; when a render
+    plus encode overruns the frame budget the quality steps down, and it
+    steps back up once there is comfortable headroom.
+    """
+
+    def __init__(self, fmt: str = "jpeg", max_fps: float = 15.0, quality: int = 75):
+        self.engine = EffectEngine()
+        self.engine.load_effects(create_effects())
+        self.engine.effect_timer = effect_latency.observe
+        # Depth worker thread starts on the first frame that needs depth
+        self.depth = DepthService()
+        self.engine.depth_source = self.depth
+        self.format = fmt
+        self.max_fps = max_fps
+        self.quality = quality
+        self.enabled = False
+        self.mjpeg_viewers = 0
+
+        self.last_render = 0.0
+        self.rendered = 0
+        self.skipped = 0
+        self.latest_jpeg: Optional[bytes] = None
+        self.new_frame = asyncio.Event()
+
+    @property
+    def frame_budget(self) -> float:
+        return 1.0 / self.max_fps if self.max_fps > 0 else 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.enabled or self.mjpeg_viewers > 0
+
+    def configure(self, enabled: Optional[bool] = None, fmt: Optional[str] = None,
+                  max_fps: Optional[float] = None, quality: Optional[int] = None):
+        """Apply render-mode settings from a control message"""
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if fmt in ("jpeg", "webp"):
+            self.format = fmt
+        if max_fps is not None:
+            self.max_fps = max(1.0, float(max_fps))
+        if quality is not None:
+            self.quality = int(np.clip(quality, MIN_QUALITY, MAX_QUALITY))
+
+    def should_render(self) -> bool:
+        """Check the session's frame budget, counting frames we skip"""
+        if not self.active:
+            return False
+        if time.monotonic() - self.last_render < self.frame_budget:
+            self.skipped += 1
+            return False
+        return True
+
+    async def render(self, frame: np.ndarray, active_effects: List[str],
+                     centers: Optional[Dict[str, Tuple[float, float]]] = None) -> Optional[bytes]:
+        """
+        Process and encode a frame; returns the encoded bytes for render mode
+        centers are the session's normalized face anchors for centered effects
+        """
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        self.last_render = start
+
+        self.engine.set_active_effects(active_effects)
+        self.engine.set_centers(centers or {})
+        result = await loop.run_in_executor(render_pool, self.engine.process_frame, frame)
+
+        fmt = self.format if self.enabled else "jpeg"
+        quality = self.quality
+        encoded = await loop.run_in_executor(encoder_pool, encode_frame, result, fmt, quality)
+        if encoded is None:
+            return None
+
+        if self.mjpeg_viewers > 0:
+            if fmt == "jpeg":
+                self.latest_jpeg = encoded
+            else:
+                self.latest_jpeg = await loop.run_in_executor(
+                    encoder_pool, encode_frame, result, "jpeg", quality
+                )
+            self.new_frame.set()
+            self.new_frame.clear()
+
+        self.rendered += 1
+        self._adapt_quality(time.monotonic() - start)
+        return encoded
+
+    def _adapt_quality(self, elapsed: float):
+        budget = self.frame_budget
+        if budget <= 0:
+            return
+        if elapsed > budget and self.quality > MIN_QUALITY:
+            self.quality = max(MIN_QUALITY, self.quality - 10)
+        elif elapsed < budget * 0.5 and self.quality < MAX_QUALITY:
+            self.quality = min(MAX_QUALITY, self.quality + 5)
+
+    def stats(self) -> dict:
+        return {
+            "rendered": self.rendered,
+            "skipped": self.skipped,
+            "quality": self.quality,
+            "format": self.format,
+            "depth": self.depth.stats(),
+            "governor": self.engine.governor_stats(),
+        }
+    
+    def close(self):
+        """Stop background work owned by this session"""
+        self.depth.stop()
+
+
+def encode_frame(frame: np.ndarray, fmt: str, quality: int) -> Optional[bytes]:
+    """Encode a BGR frame as JPEG or WebP"""
+    if fmt == "webp":
+        ok, buffer = cv2.imencode(".webp", frame, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    else:
+        ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        logger.warning(f"Failed to encode rendered frame as {fmt}")
+        return None
+    return buffer.tobytes()
@@ -0,0 +1,130 @@
+"""
+Per-connection frame scheduling with latest-frame-wins backpressure
+The receive loop keeps reading from the socket while inference runs on the
+previous frame; only the newest pending frame is kept, older ones are dropped
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingFrame:
+    """A received frame waiting for inference"""
+    data: Any
+    timestamp: Optional[float] = None
+    sequence: Optional[int] = None
+    binary: bool = False
+
+
+class LatestFrameSlot:
+    """Single-slot mailbox: putting a frame replaces any frame still pending"""
+
+    def __init__(self):
+        self._frame: Optional[PendingFrame] = None
+        self._ready = asyncio.Event()
+
+    def put(self, frame: PendingFrame) -> bool:
+        """Store a frame, returns True if a pending frame was overwritten"""
+        replaced = self._frame is not None
+        self._frame = frame
+        self._ready.set()
+        return replaced
+
+    async def take(self) -> PendingFrame:
+        """Wait for and remove the newest pending frame"""
+        while self._frame is None:
+            self._ready.clear()
+            await self._ready.wait()
+        frame, self._frame = self._frame, None
+        self._ready.clear()
+        return frame
+
+
+class FrameScheduler:
+    """
+    Latest-frame-wins scheduler for one WebSocket session
+    submit() is called from the receive loop and never blocks; a background
+    task pulls the newest frame and awaits the processing coroutine, so the
+    receive of frame N+1 overlaps with inference on frame N. A frame counts
+    as processed once it is taken for processing, so stats() built while
+    processing it already include it.
+    """
+
+    def __init__(self, process: Callable[[PendingFrame], Awaitable[None]],
+                 stats_interval: float = 1.0):
+        self.process = process
+        self.slot = LatestFrameSlot()
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.fps = 0.0
+        self.stats_interval = stats_interval
+        self._last_processed: Optional[float] = None
+        self._last_stats: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the inference task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the inference task and wait for it to finish"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def submit(self, frame: PendingFrame) -> bool:
+        """Queue a frame for inference, returns True if a stale pending frame was dropped"""
+        self.received += 1
+        if self.slot.put(frame):
+            self.dropped += 1
+            return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        """Frame counters reported back to the client"""
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+        }
+
+    def stats_due(self) -> bool:
+        """True at most once per stats_interval seconds, starting with the first call"""
+        now = time.monotonic()
+        if self._last_stats is not None and now - self._last_stats < self.stats_interval:
+            return False
+        self._last_stats = now
+        return True
+
+    async def _run(self):
+        while True:
+            frame = await self.slot.take()
+            self.processed += 1
+            try:
+                await self.process(frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error processing frame {frame.sequence}: {e}")
+            self._update_fps()
+
+    def _update_fps(self):
+        # Exponential moving average of the processed frame rate
+        now = time.monotonic()
+        if self._last_processed is not None:
+            dt = now - self._last_processed
+            if dt > 0:
+                self.fps = 1.0 / dt if self.fps == 0.0 else 0.9 * self.fps + 0.1 / dt
+        self._last_processed = now
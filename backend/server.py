@@ -3,13 +3,19 @@ FastAPI server for Reality Glitcher
 Handles WebSocket connections for gesture events and effect routing
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from typing import List, Dict
+from typing import Dict, Optional
 import asyncio
 import json
 import logging
+import os
+import uuid
+import time
+import cv2
+import numpy as np
 
 import sys
 from pathlib import Path
@@ -18,9 +24,23 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from models.face_detect import FaceDetector
-from models.gesture_model import GestureDetector
+from models.gesture_model import GestureDetector, GESTURE_NAMES
+from models.detector_pool import DetectorPool, DetectorPoolBusy
+from models.process_pool import ProcessDetectorPool
 from engine.core import EffectEngine
 from engine.registry import EffectRegistry
+from protocol import (
+    decode_frame, decode_base64_frame, pack_frame, unpack_header, ProtocolError,
+    FORMAT_JPEG, FORMAT_WEBP, GestureDeltaEncoder
+)
+from scheduler import FrameScheduler, PendingFrame
+from connections import ConnectionManager, ClientConnection, DEFAULT_ROOM
+from render import SessionRenderer, decode_pool, render_pool, encoder_pool
+from metrics import (
+    registry as metrics_registry, stage_latency, frames_dropped, frames_motion_skipped,
+    face_mesh_passes,
+    CallbackGauge
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,40 +56,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def observe_detector_timings(timings: Dict[str, float], skipped: bool = False,
+                             face_mode: Optional[str] = None):
+    """Feed per-model detector timings into the stage latency histograms"""
+    if skipped:
+        frames_motion_skipped.inc()
+    if face_mode is not None:
+        face_mesh_passes.inc(face_mode)
+    for stage, seconds in timings.items():
+        stage_latency.observe(stage, seconds)
+
 # Global instances
 face_detector = FaceDetector()
-gesture_detector = GestureDetector()
+if os.environ.get("RG_INFERENCE_BACKEND", "thread") == "process":
+    # Detectors run in worker processes, frames handed off via shared memory
+    detector_pool = ProcessDetectorPool(
+        num_workers=int(os.environ.get("RG_MAX_CONCURRENCY", 0)) or None,
+        observer=observe_detector_timings
+    )
+else:
+    detector_pool = DetectorPool(
+        GestureDetector,
+        max_detectors=int(os.environ.get("RG_MAX_DETECTORS", 0)) or None,
+        max_concurrency=int(os.environ.get("RG_MAX_CONCURRENCY", 0)) or None,
+        idle_timeout=float(os.environ.get("RG_DETECTOR_IDLE_TIMEOUT", 60.0)),
+        observer=observe_detector_timings
+    )
 effect_engine = EffectEngine()
-effect_registry = EffectRegistry()
+effect_registry = EffectRegistry(gesture_names=GESTURE_NAMES)
+
+# Per-session state, keyed by session id
+renderers: Dict[str, SessionRenderer] = {}
+schedulers: Dict[str, FrameScheduler] = {}
 
 # WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"Client connected. Total connections: {len(self.active_connections)}")
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        logger.info(f"Client disconnected. Total connections: {len(self.active_connections)}")
-
-    async def broadcast(self, message: dict):
-        """Broadcast gesture events to all connected clients"""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                disconnected.append(connection)
-        
-        for conn in disconnected:
-            self.disconnect(conn)
-
-manager = ConnectionManager()
+manager = ConnectionManager(
+    max_queue=int(os.environ.get("RG_CLIENT_QUEUE", 8)),
+    max_lag=float(os.environ.get("RG_CLIENT_MAX_LAG", 5.0))
+)
+
+def _executor_queue_depths():
+    yield "detector", detector_pool.stats()["queued"]
+    yield "decode", decode_pool.waiting
+    yield "render", render_pool.waiting
+    yield "encoder", encoder_pool.waiting
+
+metrics_registry.register(CallbackGauge(
+    "rg_session_fps", "Processed frames per second per session", "session",
+    lambda: [(sid, round(sch.fps, 2)) for sid, sch in list(schedulers.items())]
+))
+metrics_registry.register(CallbackGauge(
+    "rg_session_dropped_frames", "Frames dropped so far per session", "session",
+    lambda: [(sid, sch.dropped) for sid, sch in list(schedulers.items())]
+))
+metrics_registry.register(CallbackGauge(
+    "rg_executor_queue_depth", "Work items waiting per executor", "executor",
+    _executor_queue_depths
+))
+metrics_registry.register(CallbackGauge(
+    "rg_connections", "Connected WebSocket clients", None,
+    lambda: [(None, len(manager.clients))]
+))
 
 @app.get("/")
 async def root():
@@ -78,66 +125,213 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "ws": "/ws",
-            "health": "/health"
+            "stream": "/stream/{session_id}",
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "service": "reality-glitcher"}
+    return {
+        "status": "healthy",
+        "service": "reality-glitcher",
+        "detector_pool": detector_pool.stats(),
+        "motion_skipped_frames": frames_motion_skipped.value,
+        "connections": manager.stats()
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/stream/{session_id}")
+async def mjpeg_stream(session_id: str):
+    """MJPEG stream of a session's server-rendered frames"""
+    renderer = renderers.get(session_id)
+    if renderer is None:
+        raise HTTPException(status_code=404, detail="Unknown session")
+    
+    async def frames():
+        renderer.mjpeg_viewers += 1
+        try:
+            while session_id in renderers:
+                await renderer.new_frame.wait()
+                jpeg = renderer.latest_jpeg
+                if jpeg is None:
+                    continue
+                yield (
+                    b"--frame\r\nContent-Type: image/jpeg\r\n"
+                    b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n"
+                    + jpeg + b"\r\n"
+                )
+        finally:
+            renderer.mjpeg_viewers -= 1
+    
+    return StreamingResponse(frames(), media_type="multipart/x-mixed-replace; boundary=frame")
+
+@app.on_event("startup")
+async def startup():
+    detector_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    detector_pool.shutdown()
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """Main WebSocket endpoint for gesture event streaming"""
-    await manager.connect(websocket)
+    """
+    Main WebSocket endpoint for gesture event streaming
+    Binary messages carry frames in the protocol.py format; text messages
+    carry JSON control traffic and the legacy base64 JSON frame path.
+    Frames go through a per-session latest-frame-wins scheduler so the socket
+    keeps draining while inference runs on the previous frame.
+    Clients start in the default room; a "join" control moves them to a
+    named room, and gesture events are only fanned out within the room.
+    """
+    session_id = uuid.uuid4().hex
+    client = await manager.connect(websocket, session_id, websocket.query_params.get("room", DEFAULT_ROOM))
+    renderers[session_id] = SessionRenderer()
+    deltas = GestureDeltaEncoder(float(os.environ.get("RG_KEYFRAME_INTERVAL", 1.0)))
+    scheduler = FrameScheduler(
+        lambda pending: process_frame(client, pending, scheduler, deltas),
+        stats_interval=float(os.environ.get("RG_STATS_INTERVAL", 1.0))
+    )
+    schedulers[session_id] = scheduler
+    scheduler.start()
+    await manager.send(client, {
+        "type": "session",
+        "session_id": session_id,
+        "gesture_names": effect_registry.gesture_names
+    })
     
     try:
         while True:
             # Receive frame data or control messages from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            data = await websocket.receive()
+            if data["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(data.get("code", 1000))
+            
+            if data.get("bytes") is not None:
+                # Binary frame: only parse the header here, decoding is
+                # deferred so frames dropped by the scheduler are never decoded
+                try:
+                    header = unpack_header(data["bytes"])
+                except ProtocolError as e:
+                    logger.warning(f"Dropping malformed binary frame: {e}")
+                    continue
+                if scheduler.submit(PendingFrame(
+                    data["bytes"], header.timestamp, header.sequence, binary=True
+                )):
+                    frames_dropped.inc()
+                continue
+            
+            message = json.loads(data["text"])
             
             if message.get("type") == "frame":
-                # Process frame for gestures
+                # Legacy JSON frame path (base64 encoded image)
                 frame_data = message.get("data")
                 if frame_data:
-                    # Detect gestures
-                    gestures = await detect_gestures_async(frame_data)
-                    
-                    # Get active effects based on gestures
-                    active_effects = effect_registry.get_effects_for_gestures(gestures)
-                    
-                    # Send gesture events and effects to client
-                    await manager.broadcast({
-                        "type": "gesture_event",
-                        "gestures": gestures,
-                        "active_effects": active_effects,
-                        "timestamp": message.get("timestamp")
-                    })
+                    if scheduler.submit(PendingFrame(frame_data, message.get("timestamp"))):
+                        frames_dropped.inc()
             
             elif message.get("type") == "control":
                 # Handle control messages (start/stop, effect toggle, etc.)
-                await handle_control_message(message)
+                await handle_control_message(message, client, deltas)
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         logger.info("Client disconnected")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        manager.disconnect(websocket)
+    finally:
+        await scheduler.stop()
+        schedulers.pop(session_id, None)
+        await manager.disconnect(client)
+        detector_pool.release(session_id)
+        renderer = renderers.pop(session_id, None)
+        if renderer is not None:
+            renderer.new_frame.set()
+            renderer.close()
 
-async def detect_gestures_async(frame_data: str):
-    """Async wrapper for gesture detection"""
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, detect_gestures, frame_data)
+async def process_frame(client: ClientConnection, pending: PendingFrame,
+                        scheduler: FrameScheduler, deltas: GestureDeltaEncoder):
+    """Detect gestures on a scheduled frame, broadcast changes and render if enabled"""
+    loop = asyncio.get_running_loop()
+    frame = await loop.run_in_executor(decode_pool, decode_pending, pending)
+    
+    # Detect gestures on the session's own detector, as a bitmask
+    try:
+        mask = await detector_pool.detect(client.client_id, frame)
+    except DetectorPoolBusy as e:
+        # Waiting longer would only hang the camera; the client may retry later
+        logger.warning(f"Turning away client {client.client_id}: {e}")
+        await manager.reject(client, "busy", str(e))
+        return
+    
+    # Precomputed effect lookup for this gesture combination
+    start = time.perf_counter()
+    active_effects = effect_registry.get_effects_for_mask(mask)
+    stage_latency.observe("registry", time.perf_counter() - start)
+    
+    # Only send on mask changes plus periodic keyframes
+    keyframe = deltas.update(mask)
+    if keyframe is not None:
+        event = {
+            "type": "gesture_event",
+            "mask": mask,
+            "active_effects": active_effects,
+            "keyframe": keyframe,
+            "timestamp": pending.timestamp
+        }
+        if keyframe:
+            event["gestures"] = GestureDetector.mask_to_gestures(mask)
+        if pending.sequence is not None:
+            event["sequence"] = pending.sequence
+        # Gesture state supersedes itself, so queued events from this session coalesce
+        start = time.perf_counter()
+        for room in list(client.rooms):
+            await manager.broadcast(event, room, coalesce_key=f"gesture:{client.client_id}")
+        stage_latency.observe("broadcast", time.perf_counter() - start)
+    
+    # Frame counters go to the session's own client on a fixed interval
+    if scheduler.stats_due():
+        await manager.send(client, {"type": "frame_stats", **scheduler.stats()},
+                           coalesce_key=f"stats:{client.client_id}")
+    
+    # Server-side rendering for clients without WebGPU
+    renderer = renderers.get(client.client_id)
+    if frame is not None and renderer is not None and renderer.should_render():
+        centers = detector_pool.get_centers(client.client_id)
+        encoded = await renderer.render(frame, active_effects, centers)
+        if encoded is not None and renderer.enabled:
+            fmt = FORMAT_WEBP if renderer.format == "webp" else FORMAT_JPEG
+            h, w = frame.shape[:2]
+            await manager.send(
+                client,
+                pack_frame(encoded, fmt, pending.sequence or 0, pending.timestamp or 0.0, w, h),
+                coalesce_key=f"render:{client.client_id}"
+            )
 
-def detect_gestures(frame_data: str) -> Dict[str, bool]:
-    """Detect all gestures from frame data"""
-    # This will be implemented in gesture_model.py
-    # For now, return placeholder
-    return gesture_detector.detect_all(frame_data)
+def decode_pending(pending: PendingFrame) -> Optional[np.ndarray]:
+    """Decode a binary or base64 frame into a BGR image"""
+    start = time.perf_counter()
+    try:
+        if pending.binary:
+            _, frame = decode_frame(pending.data)
+            stage_latency.observe("decode", time.perf_counter() - start)
+            return frame
+        frame = decode_base64_frame(pending.data)
+        stage_latency.observe("decode_base64", time.perf_counter() - start)
+        return frame
+    except (ProtocolError, cv2.error) as e:
+        logger.warning(f"Failed to decode frame {pending.sequence}: {e}")
+        return None
 
-async def handle_control_message(message: dict):
+async def handle_control_message(message: dict, client: ClientConnection, deltas: GestureDeltaEncoder):
     """Handle control messages from client"""
     control_type = message.get("control")
     
@@ -147,8 +341,27 @@ async def handle_control_message(message: dict):
         logger.info("Client requested stop")
     elif control_type == "toggle_effect":
         effect_name = message.get("effect")
-        effect_registry.toggle_effect(effect_name)
-        logger.info(f"Toggled effect: {effect_name}")
+        if effect_name:
+            effect_registry.toggle_effect(effect_name)
+            logger.info(f"Toggled effect: {effect_name}")
+    elif control_type == "render":
+        # Opt-in server-side rendering: {"enabled": bool, "format": "jpeg"|"webp", "fps": n, "quality": n}
+        renderer = renderers.get(client.client_id)
+        if renderer is not None:
+            renderer.configure(
+                enabled=message.get("enabled", True),
+                fmt=message.get("format"),
+                max_fps=message.get("fps"),
+                quality=message.get("quality")
+            )
+            logger.info(f"Client {client.client_id} render mode: {renderer.stats()}")
+    elif control_type == "deltas":
+        # {"enabled": false} sends a gesture_event for every processed frame
+        deltas.enabled = bool(message.get("enabled", True))
+    elif control_type == "join":
+        room = message.get("room") or DEFAULT_ROOM
+        manager.move(client, room)
+        logger.info(f"Client {client.client_id} joined room {room}")
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,23 +2,127 @@
 Core effect engine for loading and applying effects
 """
 
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
+import os
+import time
 import numpy as np
 import cv2
 
+# Effects with is_coordinate_transform = True only move pixels: apply(frame,
+# *args) equals remapping frame with compute_maps(h, w, *args, scale=1.0)
+# (float32 maps, linear interpolation). The engine builds them at reduced
+# resolution when over budget and fuses consecutive ones into one remap.
+# Effects whose cost does not fall with resolution (e.g. maps cached between
+# frames) set is_reducible = False and always run at full resolution.
+
+# Animated effects advance one step per applied frame, tuned for this rate.
+# With a stream clock set (set_clock) the engine instead calls seek(frames)
+# on every effect that has it, with the clock in these nominal frames, so the
+# animation depends only on stream time (e.g. for segmented offline renders).
+ANIMATION_FPS = 30.0
+
+# Face anchor each centered effect follows (see GestureDetector.last_centers);
+# without a face they fall back to the frame center
+EFFECT_ANCHORS = {
+    'portal_ripple': 'mouth',
+    'liquify': 'face',
+}
+
+# Resolution governor: seconds per frame all effects together should fit in
+# (RG_FRAME_BUDGET_MS, 0 disables), and the internal scales an expensive
+# effect steps through while the engine is over budget
+FRAME_BUDGET = float(os.environ.get("RG_FRAME_BUDGET_MS", 33.0)) / 1000.0
+SCALE_LEVELS = (1.0, 0.75, 0.5)
+# Quality only steps back up when the frame would still cost less than this
+# share of the budget, so levels do not flip back and forth
+HEADROOM = 0.7
+GOVERNOR_COOLDOWN = 10
+COST_SMOOTHING = 0.3
+# Costs are measured per level, skipping the first frame at each; a reduced
+# level is only kept when, after COST_SAMPLES frames, it costs at least
+# MIN_SAVING less than the level above it. Levels that did not pay are
+# skipped for SKIP_FRAMES governed frames, then measured afresh, so one
+# transient spike does not pin an effect for good
+COST_SAMPLES = 5
+MIN_SAVING = 0.1
+SKIP_FRAMES = 900
+# Effects costing less than this share of the budget at full resolution are
+# never reduced; a downscale and upscale alone would cost more than they do
+MIN_REDUCIBLE_SHARE = 0.1
+
+
+def upscale_maps(map_x: np.ndarray, map_y: np.ndarray, h: int, w: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Resize reduced-resolution sampling maps to h x w, in full-resolution pixels"""
+    small_h, small_w = map_x.shape[:2]
+    fx, fy = w / small_w, h / small_h
+    map_x = cv2.resize(map_x, (w, h), interpolation=cv2.INTER_LINEAR)
+    map_y = cv2.resize(map_y, (w, h), interpolation=cv2.INTER_LINEAR)
+    
+    # Pixel centers line up the way cv2.resize aligns them
+    map_x *= fx
+    map_x += 0.5 * fx - 0.5
+    map_y *= fy
+    map_y += 0.5 * fy - 0.5
+    return map_x, map_y
+
 class EffectEngine:
     """Main effect engine for processing frames"""
     
-    def __init__(self):
+    def __init__(self, frame_budget: Optional[float] = None):
         self.active_effects: List[str] = []
         self.effect_instances: Dict = {}
         self.frame_history: List[np.ndarray] = []
         self.max_history = 2
+        # Optional hook called with (effect_name, seconds) after each effect
+        self.effect_timer: Optional[Callable[[str, float], None]] = None
+        # Optional depth provider for depth effects: submit(frame) and
+        # get((h, w)) -> depth map or None (see models.depth_estimator.DepthService)
+        self.depth_source = None
+        # Normalized (x, y) face anchors by name, e.g. {'mouth': (0.5, 0.6)}
+        self.centers: Dict[str, Tuple[float, float]] = {}
+        # Stream time in seconds, or None to let effects count their own frames
+        self.clock: Optional[float] = None
+        
+        # Resolution governor: SCALE_LEVELS index per effect, smoothed
+        # measured cost and sample count per (effect, level), levels that did
+        # not pay off per effect (with the governed frame they were skipped
+        # at) and smoothed cost per frame (seconds)
+        self.frame_budget = FRAME_BUDGET if frame_budget is None else frame_budget
+        self.effect_levels: Dict[str, int] = {}
+        self.effect_cost: Dict[Tuple[str, int], float] = {}
+        self.cost_samples: Dict[Tuple[str, int], int] = {}
+        self.skipped_levels: Dict[str, Dict[int, int]] = {}
+        self._governed_frames = 0
+        self.frame_cost = 0.0
+        self._governor_cooldown = 0
     
     def load_effect(self, effect_name: str, effect_class):
         """Load an effect instance"""
         self.effect_instances[effect_name] = effect_class
     
+    def load_effects(self, effects: Dict):
+        """Load several effect instances at once (name -> instance)"""
+        self.effect_instances.update(effects)
+    
+    def set_active_effects(self, effect_names: List[str]):
+        """Replace the active effect list, e.g. from EffectRegistry gesture lookups"""
+        self.active_effects = list(effect_names)
+    
+    def set_centers(self, centers: Dict[str, Tuple[float, float]]):
+        """Replace the face anchors, e.g. from GestureDetector.last_centers"""
+        self.centers = dict(centers)
+    
+    def set_clock(self, seconds: Optional[float]):
+        """Set the stream time animated effects follow, e.g. frame_index / fps; None to unset"""
+        self.clock = seconds
+    
+    def effect_center(self, effect_name: str, h: int, w: int) -> Tuple[int, int]:
+        """Pixel center for a centered effect: its face anchor, else the frame center"""
+        anchor = self.centers.get(EFFECT_ANCHORS.get(effect_name))
+        if anchor is None:
+            return (w // 2, h // 2)
+        return (int(anchor[0] * w), int(anchor[1] * h))
+    
     def activate_effect(self, effect_name: str):
         """Activate an effect"""
         if effect_name not in self.active_effects:
@@ -50,27 +154,280 @@ class EffectEngine:
         
         prev_frame = self.frame_history[0] if len(self.frame_history) > 1 else None
         
-        # Apply effects in order
-        for effect_name in self.active_effects:
-            if effect_name in self.effect_instances:
+        # Depth comes from the unprocessed frame; the provider never blocks
+        depth = None
+        if self.depth_source is not None and 'depth_warp' in self.active_effects:
+            self.depth_source.submit(frame)
+            depth = self.depth_source.get(frame.shape[:2])
+        
+        if self.clock is not None:
+            for effect_name in self.active_effects:
+                effect = self.effect_instances.get(effect_name)
+                if hasattr(effect, 'seek'):
+                    effect.seek(self.clock * ANIMATION_FPS)
+        
+        # Apply effects in order; runs of coordinate transforms sample the frame once
+        h, w = frame.shape[:2]
+        spent = 0.0
+        for group in self._group_effects(h, w, prev_frame, depth):
+            if len(group) > 1:
+                result, timings = self._apply_fused(group, result, prev_frame, depth)
+            else:
+                effect_name = group[0]
                 effect = self.effect_instances[effect_name]
+                start = time.perf_counter()
                 try:
                     # Apply effect (effects handle their own parameters)
                     if hasattr(effect, 'apply'):
-                        if effect_name == 'slow_motion':
-                            result = effect.apply(result, prev_frame)
-                        elif effect_name in ['portal_ripple', 'liquify']:
-                            # These need center point - use frame center for now
-                            h, w = result.shape[:2]
-                            center = (w // 2, h // 2)
-                            result = effect.apply(result, center)
-                        else:
-                            result = effect.apply(result)
+                        result = self._apply_scaled(effect_name, effect, result, self._scale(effect_name),
+                                                    prev_frame, depth)
                 except Exception as e:
                     print(f"Error applying effect {effect_name}: {e}")
+                timings = {effect_name: time.perf_counter() - start}
+            
+            for effect_name, elapsed in timings.items():
+                spent += elapsed
+                self._record_cost(effect_name, elapsed, self.effect_levels.get(effect_name, 0))
+                if self.effect_timer is not None:
+                    self.effect_timer(effect_name, elapsed)
         
+        self._govern(spent)
         return result
     
+    def _scale(self, effect_name: str) -> float:
+        return SCALE_LEVELS[self.effect_levels.get(effect_name, 0)]
+    
+    def _is_fusable(self, effect_name: str, h: int, w: int,
+                    prev_frame: Optional[np.ndarray], depth: Optional[np.ndarray]) -> bool:
+        """A pure coordinate transform with all of its inputs available"""
+        effect = self.effect_instances[effect_name]
+        if not getattr(effect, 'is_coordinate_transform', False):
+            return False
+        return all(arg is not None for arg in self._effect_args(effect_name, h, w, prev_frame, depth))
+    
+    def _group_effects(self, h: int, w: int, prev_frame: Optional[np.ndarray],
+                       depth: Optional[np.ndarray]) -> List[List[str]]:
+        """Active effects in order, with consecutive fusable warps grouped together"""
+        groups: List[List[str]] = []
+        previous_fusable = False
+        for effect_name in self.active_effects:
+            if effect_name not in self.effect_instances:
+                continue
+            fusable = self._is_fusable(effect_name, h, w, prev_frame, depth)
+            if fusable and previous_fusable:
+                groups[-1].append(effect_name)
+            else:
+                groups.append([effect_name])
+            previous_fusable = fusable
+        return groups
+    
+    def _warp_maps(self, effect_name: str, effect, h: int, w: int, scale: float,
+                   prev_frame: Optional[np.ndarray],
+                   depth: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Full-resolution sampling maps of a coordinate transform, built at scale"""
+        small_w, small_h = max(1, round(w * scale)), max(1, round(h * scale))
+        if (small_h, small_w) == (h, w):
+            return effect.compute_maps(h, w, *self._effect_args(effect_name, h, w, prev_frame, depth))
+        args = self._effect_args(effect_name, small_h, small_w, prev_frame, depth)
+        map_x, map_y = effect.compute_maps(small_h, small_w, *args, scale=small_w / w)
+        return upscale_maps(map_x, map_y, h, w)
+    
+    def _apply_fused(self, group: List[str], frame: np.ndarray, prev_frame: Optional[np.ndarray],
+                     depth: Optional[np.ndarray]) -> Tuple[np.ndarray, Dict[str, float]]:
+        """
+        Run consecutive coordinate transforms as one remap of the frame
+        Applying A then B samples the frame at A's map looked up at B's map,
+        so the maps are composed by remapping A's maps through B's, which
+        is cheap next to interpolating the image once per effect.
+        Returns the result and the seconds spent per effect.
+        """
+        h, w = frame.shape[:2]
+        timings: Dict[str, float] = {}
+        composite = None
+        for effect_name in group:
+            effect = self.effect_instances[effect_name]
+            start = time.perf_counter()
+            try:
+                map_x, map_y = self._warp_maps(effect_name, effect, h, w, self._scale(effect_name),
+                                               prev_frame, depth)
+                if composite is None:
+                    composite = (map_x, map_y)
+                else:
+                    composite = (
+                        cv2.remap(composite[0], map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE),
+                        cv2.remap(composite[1], map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE),
+                    )
+            except Exception as e:
+                print(f"Error applying effect {effect_name}: {e}")
+            timings[effect_name] = time.perf_counter() - start
+        
+        if composite is None:
+            return frame, timings
+        
+        # The single image pass is shared out evenly between the fused effects
+        start = time.perf_counter()
+        result = cv2.remap(frame, composite[0], composite[1], cv2.INTER_LINEAR,
+                           borderMode=cv2.BORDER_REPLICATE)
+        share = (time.perf_counter() - start) / len(group)
+        return result, {name: elapsed + share for name, elapsed in timings.items()}
+    
+    def _effect_args(self, effect_name: str, h: int, w: int,
+                     prev_frame: Optional[np.ndarray], depth: Optional[np.ndarray]) -> tuple:
+        """Extra apply() arguments for an effect running at h x w"""
+        if effect_name == 'slow_motion':
+            if prev_frame is not None and prev_frame.shape[:2] != (h, w):
+                prev_frame = cv2.resize(prev_frame, (w, h), interpolation=cv2.INTER_AREA)
+            return (prev_frame,)
+        if effect_name == 'depth_warp':
+            return (depth,)
+        if effect_name in EFFECT_ANCHORS:
+            # Centered on a face landmark when one is known
+            return (self.effect_center(effect_name, h, w),)
+        return ()
+    
+    def _apply_scaled(self, effect_name: str, effect, frame: np.ndarray, scale: float,
+                      prev_frame: Optional[np.ndarray], depth: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Run an effect at scale times the frame resolution
+        Coordinate transforms build their maps small and still sample the
+        full-resolution frame; other effects run on a downscaled copy that
+        is scaled back up.
+        """
+        h, w = frame.shape[:2]
+        small_w, small_h = max(1, round(w * scale)), max(1, round(h * scale))
+        if (small_h, small_w) == (h, w):
+            return effect.apply(frame, *self._effect_args(effect_name, h, w, prev_frame, depth))
+        
+        args = self._effect_args(effect_name, small_h, small_w, prev_frame, depth)
+        if any(arg is None for arg in args):
+            # Missing inputs make the effect a pass-through; nothing to save
+            return effect.apply(frame, *self._effect_args(effect_name, h, w, prev_frame, depth))
+        
+        if getattr(effect, 'is_coordinate_transform', False):
+            map_x, map_y = self._warp_maps(effect_name, effect, h, w, scale, prev_frame, depth)
+            return cv2.remap(frame, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        
+        small = cv2.resize(frame, (small_w, small_h), interpolation=cv2.INTER_AREA)
+        return cv2.resize(effect.apply(small, *args), (w, h), interpolation=cv2.INTER_LINEAR)
+    
+    def _record_cost(self, effect_name: str, elapsed: float, level: int):
+        """Smooth an effect's measured cost at the SCALE_LEVELS index it ran at"""
+        key = (effect_name, level)
+        self.cost_samples[key] = self.cost_samples.get(key, 0) + 1
+        if self.cost_samples[key] == 1:
+            return  # The first frame at a level also pays for its caches
+        previous = self.effect_cost.get(key)
+        if previous is None:
+            self.effect_cost[key] = elapsed
+        else:
+            self.effect_cost[key] = previous + COST_SMOOTHING * (elapsed - previous)
+    
+    def _cost(self, effect_name: str, level: int) -> float:
+        """Smoothed measured cost of an effect at a SCALE_LEVELS index"""
+        return self.effect_cost.get((effect_name, level), 0.0)
+    
+    def _next_level(self, effect_name: str, level: int, step: int) -> Optional[int]:
+        """Nearest SCALE_LEVELS index below (step 1) or above (step -1) that is not skipped"""
+        skipped = self.skipped_levels.get(effect_name, ())
+        level += step
+        while 0 <= level < len(SCALE_LEVELS):
+            if level not in skipped:
+                return level
+            level += step
+        return None
+    
+    def _is_reducible(self, effect_name: str) -> bool:
+        """Has a lower level left, with its current level measured often enough to compare against"""
+        effect = self.effect_instances.get(effect_name)
+        if not getattr(effect, 'is_reducible', True):
+            return False
+        level = self.effect_levels.get(effect_name, 0)
+        if self.cost_samples.get((effect_name, level), 0) < COST_SAMPLES:
+            return False
+        if self._cost(effect_name, 0) < self.frame_budget * MIN_REDUCIBLE_SHARE:
+            return False
+        return self._next_level(effect_name, level, 1) is not None
+    
+    def _expire_skips(self):
+        """Forget skipped levels older than SKIP_FRAMES, with their measurements"""
+        for name, levels in list(self.skipped_levels.items()):
+            for level, skipped_at in list(levels.items()):
+                if self._governed_frames - skipped_at >= SKIP_FRAMES:
+                    del levels[level]
+                    self.effect_cost.pop((name, level), None)
+                    self.cost_samples.pop((name, level), None)
+            if not levels:
+                del self.skipped_levels[name]
+    
+    def _revert_unprofitable(self, active: List[str]) -> bool:
+        """Step back up any effect whose reduced level did not save time; True if one did"""
+        for name in active:
+            level = self.effect_levels.get(name, 0)
+            if level == 0 or self.cost_samples.get((name, level), 0) < COST_SAMPLES:
+                continue
+            # Compare against the nearest level above with a measurement of its own
+            above = self._next_level(name, level, -1)
+            while above > 0 and self.cost_samples.get((name, above), 0) < COST_SAMPLES:
+                above = self._next_level(name, above, -1)
+            if self._cost(name, level) > self._cost(name, above) * (1.0 - MIN_SAVING):
+                self.skipped_levels.setdefault(name, {})[level] = self._governed_frames
+                self.effect_levels[name] = above
+                self._governor_cooldown = GOVERNOR_COOLDOWN
+                return True
+        return False
+    
+    def _govern(self, spent: float):
+        """Step one effect's resolution down when over budget, or up when there is room"""
+        if self.frame_budget <= 0:
+            return
+        self.frame_cost += COST_SMOOTHING * (spent - self.frame_cost)
+        self._governed_frames += 1
+        self._expire_skips()
+        if self._governor_cooldown > 0:
+            self._governor_cooldown -= 1
+            return
+        
+        active = [name for name in self.active_effects
+                  if (name, self.effect_levels.get(name, 0)) in self.effect_cost]
+        if self._revert_unprofitable(active):
+            return
+        
+        if self.frame_cost > self.frame_budget:
+            # The effect costing the most right now gives the biggest saving
+            reducible = [n for n in active if self._is_reducible(n)]
+            if reducible:
+                name = max(reducible, key=lambda n: self._cost(n, self.effect_levels.get(n, 0)))
+                self.effect_levels[name] = self._next_level(name, self.effect_levels.get(name, 0), 1)
+                self._governor_cooldown = GOVERNOR_COOLDOWN
+            return
+        
+        # Restore the cheapest step up, only if the frame still fits with headroom
+        def step_up_cost(n: str) -> float:
+            level = self.effect_levels[n]
+            return self._cost(n, self._next_level(n, level, -1)) - self._cost(n, level)
+        
+        reduced = [n for n in active if self.effect_levels.get(n, 0) > 0]
+        if reduced:
+            name = min(reduced, key=step_up_cost)
+            if self.frame_cost + step_up_cost(name) < self.frame_budget * HEADROOM:
+                self.effect_levels[name] = self._next_level(name, self.effect_levels[name], -1)
+                self._governor_cooldown = GOVERNOR_COOLDOWN
+    
+    def governor_stats(self) -> dict:
+        """Budget, smoothed frame cost and the effects running below full resolution"""
+        return {
+            "budget_ms": round(self.frame_budget * 1000, 1),
+            "frame_cost_ms": round(self.frame_cost * 1000, 1),
+            "scales": {
+                name: SCALE_LEVELS[level] for name, level in self.effect_levels.items() if level > 0
+            },
+            # Scales that did not save time, per effect; the governor skips them
+            "skipped_scales": {
+                name: sorted(SCALE_LEVELS[level] for level in levels)
+                for name, levels in self.skipped_levels.items()
+            },
+        }
+    
     def clear_effects(self):
         """Clear all active effects"""
         self.active_effects = []
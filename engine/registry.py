@@ -4,16 +4,33 @@ Effect registry - maps gestures to shader/effect pipelines
 
 import json
 import os
-from typing import Dict, List, Set
+from typing import Dict, List, Sequence, Set, Tuple
 from pathlib import Path
 
+# Default gesture bit order, matching models.gesture_model.GESTURE_NAMES
+DEFAULT_GESTURE_NAMES = (
+    "blink",
+    "smile",
+    "raise_hand",
+    "both_hands_up",
+    "head_tilt",
+    "mouth_open",
+    "eyebrow_raise"
+)
+
 class EffectRegistry:
-    """Registry for mapping gestures to effects"""
+    """
+    Registry for mapping gestures to effects
+    Gesture combinations are looked up by bitmask in a table precomputed for
+    every mask; the table is rebuilt only when mappings or enabled flags change
+    """
     
-    def __init__(self, config_path: str = None):
+    def __init__(self, config_path: str = None, gesture_names: Sequence[str] = DEFAULT_GESTURE_NAMES):
         self.gesture_to_effects: Dict[str, List[str]] = {}
         self.active_effects: Set[str] = set()
         self.effect_enabled: Dict[str, bool] = {}
+        self.gesture_names: List[str] = list(gesture_names)
+        self._mask_table: List[Tuple[str, ...]] = []
         
         if config_path is None:
             config_path = os.path.join(
@@ -41,7 +58,7 @@ class EffectRegistry:
                     "blink": ["flipGravity"],
                     "smile": ["liquify"],
                     "raise_hand": ["matrix"],
-                    "head_tilt": ["vhs"],
+                    "head_tilt": ["vhs", "depth_warp"],
                     "both_hands_up": ["slow_motion"],
                     "mouth_open": ["portal_ripple"],
                     "eyebrow_raise": ["pixel_sort"]
@@ -55,11 +72,51 @@ class EffectRegistry:
                 "blink": ["flipGravity"],
                 "smile": ["liquify"],
                 "raise_hand": ["matrix"],
-                "head_tilt": ["vhs"],
+                "head_tilt": ["vhs", "depth_warp"],
                 "both_hands_up": ["slow_motion"],
                 "mouth_open": ["portal_ripple"],
                 "eyebrow_raise": ["pixel_sort"]
             }
+        
+        self._rebuild_table()
+    
+    def _rebuild_table(self):
+        """Precompute the active effect tuple for every gesture mask"""
+        for gesture in self.gesture_to_effects:
+            if gesture not in self.gesture_names:
+                self.gesture_names.append(gesture)
+        
+        # Enabled effects per gesture bit, in mapping order
+        bit_effects = [
+            [e for e in self.gesture_to_effects.get(gesture, []) if self.effect_enabled.get(e, True)]
+            for gesture in self.gesture_names
+        ]
+        
+        table = []
+        for mask in range(1 << len(self.gesture_names)):
+            effects = []
+            for bit, names in enumerate(bit_effects):
+                if mask & (1 << bit):
+                    for effect in names:
+                        if effect not in effects:
+                            effects.append(effect)
+            table.append(tuple(effects))
+        self._mask_table = table
+    
+    def gestures_to_mask(self, gestures: Dict[str, bool]) -> int:
+        """Pack a gesture dict into a bitmask using this registry's bit order"""
+        mask = 0
+        for bit, gesture in enumerate(self.gesture_names):
+            if gestures.get(gesture):
+                mask |= 1 << bit
+        return mask
+    
+    def get_effects_for_mask(self, mask: int) -> Tuple[str, ...]:
+        """
+        Get effects to activate for a gesture bitmask
+        Returns a shared precomputed tuple; no per-call allocation
+        """
+        return self._mask_table[mask & (len(self._mask_table) - 1)]
     
     def save_config(self, config_path: str):
         """Save current configuration to file"""
@@ -78,28 +135,22 @@ class EffectRegistry:
         Get list of effects to activate based on current gestures
         Returns list of effect names
         """
-        active_effects = set()
-        
-        for gesture, is_active in gestures.items():
-            if is_active and gesture in self.gesture_to_effects:
-                effects = self.gesture_to_effects[gesture]
-                for effect in effects:
-                    if self.effect_enabled.get(effect, True):
-                        active_effects.add(effect)
-        
-        return list(active_effects)
+        return list(self.get_effects_for_mask(self.gestures_to_mask(gestures)))
     
     def toggle_effect(self, effect_name: str):
         """Toggle an effect on/off"""
         self.effect_enabled[effect_name] = not self.effect_enabled.get(effect_name, True)
+        self._rebuild_table()
     
     def enable_effect(self, effect_name: str):
         """Enable an effect"""
         self.effect_enabled[effect_name] = True
+        self._rebuild_table()
     
     def disable_effect(self, effect_name: str):
         """Disable an effect"""
         self.effect_enabled[effect_name] = False
+        self._rebuild_table()
     
     def register_gesture_mapping(self, gesture: str, effects: List[str]):
         """Register a new gesture-to-effect mapping"""
@@ -107,4 +158,5 @@ class EffectRegistry:
         for effect in effects:
             if effect not in self.effect_enabled:
                 self.effect_enabled[effect] = True
+        self._rebuild_table()
 
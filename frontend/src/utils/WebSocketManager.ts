@@ -5,16 +5,45 @@
 export interface GestureEvent {
   type: string
   gestures: Record<string, boolean>
+  mask?: number
+  keyframe?: boolean
   active_effects: string[]
   timestamp?: number
+  sequence?: number
 }
 
+// Per-session frame counters, sent by the server on a fixed interval
+export interface FrameStats {
+  received: number
+  processed: number
+  dropped: number
+}
+
+// Binary frame protocol (see backend/protocol.py)
+// Header: magic 'RG', version, format, sequence u32, timestamp f64, width u16, height u16
+const FRAME_HEADER_SIZE = 20
+const FRAME_PROTOCOL_VERSION = 1
+
+export const FrameFormat = {
+  JPEG: 1,
+  WEBP: 2,
+  RGB: 3,
+  RGBA: 4
+} as const
+
 export class WebSocketManager {
   private ws: WebSocket | null = null
   private reconnectAttempts = 0
   private maxReconnectAttempts = 5
   private reconnectDelay = 3000
+  private frameSequence = 0
+  // Gesture bit order announced by the server in its session message
+  private gestureNames: string[] = [
+    'blink', 'smile', 'raise_hand', 'both_hands_up', 'head_tilt', 'mouth_open', 'eyebrow_raise'
+  ]
+  public sessionId: string | null = null
   public onGestureEvent: ((event: GestureEvent) => void) | null = null
+  public onFrameStats: ((stats: FrameStats) => void) | null = null
 
   async connect(): Promise<void> {
     return new Promise((resolve, reject) => {
@@ -30,9 +59,23 @@ export class WebSocketManager {
 
         this.ws.onmessage = (event) => {
           try {
+            if (typeof event.data !== 'string') {
+              return
+            }
             const data = JSON.parse(event.data)
-            if (data.type === 'gesture_event' && this.onGestureEvent) {
+            if (data.type === 'session') {
+              this.sessionId = data.session_id
+              if (Array.isArray(data.gesture_names)) {
+                this.gestureNames = data.gesture_names
+              }
+            } else if (data.type === 'gesture_event' && this.onGestureEvent) {
+              // Delta events only carry the bitmask; expand it for listeners
+              if (!data.gestures && typeof data.mask === 'number') {
+                data.gestures = this.maskToGestures(data.mask)
+              }
               this.onGestureEvent(data as GestureEvent)
+            } else if (data.type === 'frame_stats' && this.onFrameStats) {
+              this.onFrameStats(data as FrameStats)
             }
           } catch (error) {
             console.error('Error parsing WebSocket message:', error)
@@ -54,6 +97,14 @@ export class WebSocketManager {
     })
   }
 
+  private maskToGestures(mask: number): Record<string, boolean> {
+    const gestures: Record<string, boolean> = {}
+    this.gestureNames.forEach((name, bit) => {
+      gestures[name] = (mask & (1 << bit)) !== 0
+    })
+    return gestures
+  }
+
   private attemptReconnect() {
     if (this.reconnectAttempts < this.maxReconnectAttempts) {
       this.reconnectAttempts++
@@ -78,6 +129,27 @@ export class WebSocketManager {
     }
   }
 
+  /**
+   * Send a frame using the binary protocol (no base64, no JSON)
+   * payload is an encoded JPEG/WebP image or raw RGB/RGBA pixels
+   */
+  sendFrameBinary(payload: ArrayBuffer, format: number = FrameFormat.JPEG, width = 0, height = 0) {
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+      const message = new Uint8Array(FRAME_HEADER_SIZE + payload.byteLength)
+      const view = new DataView(message.buffer)
+      message[0] = 0x52 // 'R'
+      message[1] = 0x47 // 'G'
+      view.setUint8(2, FRAME_PROTOCOL_VERSION)
+      view.setUint8(3, format)
+      view.setUint32(4, this.frameSequence++ >>> 0, true)
+      view.setFloat64(8, Date.now(), true)
+      view.setUint16(16, width, true)
+      view.setUint16(18, height, true)
+      message.set(new Uint8Array(payload), FRAME_HEADER_SIZE)
+      this.ws.send(message.buffer)
+    }
+  }
+
   sendControl(control: string, data?: any) {
     if (this.ws && this.ws.readyState === WebSocket.OPEN) {
       this.ws.send(JSON.stringify({